@@ -1,8 +1,17 @@
 #!/usr/bin/env python3
 import argparse
+import collections
+import copy
+import csv
+import hashlib
+import json
 import os
 import sys
 import math
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappop, heappush
 import networkx as nx
 
 
@@ -41,7 +50,7 @@ def read_graph(path: str) -> nx.DiGraph:
     return G
 
 
-def node_from_arg(G: nx.DiGraph, token: str):
+def find_node(G: nx.DiGraph, token: str):
     # try string node, then int node
     if token in G:
         return token
@@ -51,7 +60,14 @@ def node_from_arg(G: nx.DiGraph, token: str):
             return t
     except ValueError:
         pass
-    die(f"Node '{token}' not found in graph.")
+    return None
+
+
+def node_from_arg(G: nx.DiGraph, token: str):
+    node = find_node(G, token)
+    if node is None:
+        die(f"Node '{token}' not found in graph.")
+    return node
 
 
 def marginal(mode: str, a: float, b: float, x: int) -> float:
@@ -63,29 +79,448 @@ def marginal(mode: str, a: float, b: float, x: int) -> float:
     die("Internal: bad mode", 1)
 
 
-def route_one(G: nx.DiGraph, flow, s, t, mode: str):
-    # Dijkstra with dynamic edge weights = marginal cost given current flow
-    def weight(u, v, data):
-        x = flow[(u, v)]
-        a, b = float(data["a"]), float(data["b"])
-        return marginal(mode, a, b, x)
-
+class RoadNetwork:
+    """Graph compiled once into CSR arrays for repeated routing in one mode.
+
+    Edge ids are CSR positions: the out-edges of node i are the ids
+    indptr[i] .. indptr[i+1]-1, running tails[e] -> heads[e]; the in-edges
+    of node i are redges[rindptr[i] .. rindptr[i+1]-1]. The latency
+    parameters, the current flow and the marginal cost of the next vehicle
+    are stored per edge id as float64 ('d') and int64 ('q') vectors, so
+    routing never touches NetworkX.
+    """
+
+    def __init__(self, G: nx.DiGraph, mode: str):
+        if mode == "equilibrium":
+            self.k = 1
+        elif mode == "social":
+            self.k = 2
+        else:
+            die("Internal: bad mode", 1)
+        self.mode = mode
+
+        self.nodes = list(G.nodes())
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        n = len(self.nodes)
+        self.edges = []
+        self.indptr = array("q", [0] * (n + 1))
+        self.tails = array("q")
+        self.heads = array("q")
+        self.a = array("d")
+        self.b = array("d")
+        # G.edges() yields edges grouped by source in node order, which is
+        # exactly CSR order.
+        for u, v, data in G.edges(data=True):
+            self.edges.append((u, v))
+            self.indptr[self.index[u] + 1] += 1
+            self.tails.append(self.index[u])
+            self.heads.append(self.index[v])
+            self.a.append(float(data["a"]))
+            self.b.append(float(data["b"]))
+        for i in range(n):
+            self.indptr[i + 1] += self.indptr[i]
+
+        self.rindptr = array("q", [0] * (n + 1))
+        for v in self.heads:
+            self.rindptr[v + 1] += 1
+        for i in range(n):
+            self.rindptr[i + 1] += self.rindptr[i]
+        fill = array("q", self.rindptr[:n])
+        self.redges = array("q", [0] * len(self.edges))
+        for e, v in enumerate(self.heads):
+            self.redges[fill[v]] = e
+            fill[v] += 1
+
+        self.flow = array("q", [0] * len(self.edges))
+        self.cost = array("d", (marginal(mode, a, b, 0) for a, b in zip(self.a, self.b)))
+        self.blocked = bytearray(len(self.edges))
+
+    def fork(self):
+        """Copy sharing the compiled graph but with its own flow, cost and mask."""
+        other = copy.copy(self)
+        other.flow = array("q", self.flow)
+        other.cost = array("d", self.cost)
+        other.blocked = bytearray(self.blocked)
+        return other
+
+    def block(self, e: int):
+        """Mask edge e out of routing (its cost becomes infinite)."""
+        self.blocked[e] = 1
+        self.cost[e] = math.inf
+
+    def add_flow(self, e: int, dx: int):
+        x = self.flow[e] = self.flow[e] + dx
+        if not self.blocked[e]:
+            self.cost[e] = self.a[e] * (self.k * x + 1) + self.b[e]
+
+    def total_travel_time(self):
+        return sum(x * latency(a, b, x) for a, b, x in zip(self.a, self.b, self.flow))
+
+    def flow_dict(self):
+        return dict(zip(self.edges, self.flow))
+
+
+def shortest_path(net: RoadNetwork, s: int, t: int):
+    """Edge ids of a cheapest s -> t path under net.cost, or None.
+
+    Bidirectional Dijkstra: alternately settles the closer of the forward
+    frontier (out-edges from s) and the backward frontier (in-edges to t),
+    and stops once no unsettled pair can beat the best meeting point.
+    """
+    indptr, heads, rindptr, redges, tails, cost = (
+        net.indptr, net.heads, net.rindptr, net.redges, net.tails, net.cost)
+    n = len(net.nodes)
+    inf = math.inf
+    done_f, done_b = bytearray(n), bytearray(n)
+    seen_f, seen_b = [inf] * n, [inf] * n
+    seen_f[s] = seen_b[t] = 0.0
+    pred_f, pred_b = {}, {}  # node -> edge id towards s / towards t
+    fringe_f, fringe_b = [(0.0, s)], [(0.0, t)]
+    best, meet = inf, None
+    if s == t:
+        best, meet = 0.0, s
+
+    while fringe_f and fringe_b:
+        if fringe_f[0][0] + fringe_b[0][0] >= best:
+            break
+        if fringe_f[0][0] <= fringe_b[0][0]:
+            d, v = heappop(fringe_f)
+            if done_f[v]:
+                continue
+            done_f[v] = 1
+            for e in range(indptr[v], indptr[v + 1]):
+                du = d + cost[e]
+                u = heads[e]
+                if du < seen_f[u]:
+                    seen_f[u] = du
+                    pred_f[u] = e
+                    heappush(fringe_f, (du, u))
+                    if du + seen_b[u] < best:
+                        best, meet = du + seen_b[u], u
+        else:
+            d, v = heappop(fringe_b)
+            if done_b[v]:
+                continue
+            done_b[v] = 1
+            for i in range(rindptr[v], rindptr[v + 1]):
+                e = redges[i]
+                du = d + cost[e]
+                u = tails[e]
+                if du < seen_b[u]:
+                    seen_b[u] = du
+                    pred_b[u] = e
+                    heappush(fringe_b, (du, u))
+                    if du + seen_f[u] < best:
+                        best, meet = du + seen_f[u], u
+
+    if meet is None:
+        return None
+    path = []
+    v = meet
+    while v != s:
+        e = pred_f[v]
+        path.append(e)
+        v = tails[e]
+    path.reverse()
+    v = meet
+    while v != t:
+        e = pred_b[v]
+        path.append(e)
+        v = heads[e]
+    return path
+
+
+def free_flow_distances(net: RoadNetwork, src: int, reverse: bool = False):
+    """Free-flow (b-weighted) travel times from src to every node.
+
+    With reverse=True the in-edges are followed instead, giving the travel
+    time from every node to src. Unreachable nodes get math.inf.
+    """
+    n = len(net.nodes)
+    dist = array("d", [math.inf] * n)
+    dist[src] = 0.0
+    done = bytearray(n)
+    fringe = [(0.0, src)]
+    while fringe:
+        d, v = heappop(fringe)
+        if done[v]:
+            continue
+        done[v] = 1
+        if reverse:
+            edges = (net.redges[i] for i in range(net.rindptr[v], net.rindptr[v + 1]))
+        else:
+            edges = range(net.indptr[v], net.indptr[v + 1])
+        for e in edges:
+            u = net.tails[e] if reverse else net.heads[e]
+            du = d + net.b[e]
+            if du < dist[u]:
+                dist[u] = du
+                heappush(fringe, (du, u))
+    return dist
+
+
+class LandmarkIndex:
+    """ALT index: free-flow travel times to and from a few landmark nodes.
+
+    By the triangle inequality, for every landmark L
+        d(v, t) >= d(L, t) - d(L, v)   and   d(v, t) >= d(v, L) - d(t, L),
+    where d is travel time at free flow (latency b). Marginal costs are
+    a*(k*x + 1) + b >= b, so these bounds stay admissible however much flow
+    is routed, and A* with them settles far fewer nodes than Dijkstra.
+    """
+
+    def __init__(self, landmarks, forward, backward):
+        self.landmarks = landmarks  # node indices
+        self.forward = forward      # forward[i][v] = d(L_i, v)
+        self.backward = backward    # backward[i][v] = d(v, L_i)
+
+    @classmethod
+    def build(cls, net: RoadNetwork, k: int):
+        # Farthest-point selection: each new landmark is the node whose
+        # free-flow distance from the nearest chosen landmark is largest.
+        n = len(net.nodes)
+        landmarks, forward, backward = [], [], []
+        spread = free_flow_distances(net, 0)
+        while len(landmarks) < min(k, n):
+            candidates = [v for v in range(n) if v not in landmarks and spread[v] < math.inf]
+            if not candidates:
+                candidates = [v for v in range(n) if v not in landmarks]
+            L = max(candidates, key=lambda v: spread[v])
+            landmarks.append(L)
+            forward.append(free_flow_distances(net, L))
+            backward.append(free_flow_distances(net, L, reverse=True))
+            if len(landmarks) == 1:
+                spread = array("d", forward[0])
+            else:
+                spread = array("d", map(min, spread, forward[-1]))
+        return cls(landmarks, forward, backward)
+
+    def heuristic(self, t: int):
+        """Lower bound on the cost from every node to t (math.inf if t is unreachable)."""
+        h = [0.0] * len(self.forward[0]) if self.forward else []
+        for fwd, bwd in zip(self.forward, self.backward):
+            to_t, from_t = fwd[t], bwd[t]
+            for v in range(len(h)):
+                # inf - finite is a valid bound (v cannot reach t); skip inf - inf
+                if fwd[v] < math.inf:
+                    bound = to_t - fwd[v]
+                    if bound > h[v]:
+                        h[v] = bound
+                if from_t < math.inf:
+                    bound = bwd[v] - from_t
+                    if bound > h[v]:
+                        h[v] = bound
+        return h
+
+    def save(self, path: str, fingerprint: str):
+        header = {"sha256": fingerprint, "landmarks": self.landmarks}
+        with open(path, "wb") as fh:
+            fh.write(json.dumps(header).encode() + b"\n")
+            for dist in self.forward + self.backward:
+                dist.tofile(fh)
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str, n: int):
+        """Read a cached index, or return None if it is missing or stale."""
+        try:
+            with open(path, "rb") as fh:
+                header = json.loads(fh.readline())
+                if header.get("sha256") != fingerprint:
+                    return None
+                k = len(header["landmarks"])
+                vectors = []
+                for _ in range(2 * k):
+                    dist = array("d")
+                    dist.fromfile(fh, n)
+                    vectors.append(dist)
+        except (OSError, ValueError, EOFError, KeyError):
+            return None
+        return cls(header["landmarks"], vectors[:k], vectors[k:])
+
+
+def load_landmarks(gml_path: str, G: nx.DiGraph, k: int) -> LandmarkIndex:
+    """Landmark index for G, cached as <gml_path>.alt and rebuilt when the GML changes."""
+    with open(gml_path, "rb") as fh:
+        fingerprint = hashlib.sha256(fh.read()).hexdigest()
+    cache = gml_path + ".alt"
+    index = LandmarkIndex.load(cache, fingerprint, G.number_of_nodes())
+    if index is not None and len(index.landmarks) == min(k, G.number_of_nodes()):
+        return index
+
+    index = LandmarkIndex.build(RoadNetwork(G, "equilibrium"), k)
     try:
-        path = nx.shortest_path(G, s, t, weight=weight)  # list of nodes
-    except nx.NetworkXNoPath:
-        die(f"No path from {s} to {t}.")
-
-    # convert node path to edge increments
-    for i in range(len(path) - 1):
-        u, v = path[i], path[i + 1]
-        flow[(u, v)] += 1
-
-
-def compute_flow(G: nx.DiGraph, n: int, s, t, mode: str):
-    flow = {(u, v): 0 for (u, v) in G.edges()}
+        index.save(cache, fingerprint)
+    except OSError as e:
+        print(f"Warning: could not write landmark cache {cache}: {e}", file=sys.stderr)
+    return index
+
+
+def astar_path(net: RoadNetwork, s: int, t: int, h):
+    """Edge ids of a cheapest s -> t path under net.cost, or None.
+
+    A* search guided by h, a consistent lower bound on the cost to t
+    (see LandmarkIndex.heuristic).
+    """
+    indptr, heads, tails, cost = net.indptr, net.heads, net.tails, net.cost
+    n = len(net.nodes)
+    done = bytearray(n)
+    seen = [math.inf] * n
+    seen[s] = 0.0
+    pred = {}
+    fringe = [(h[s], 0.0, s)]
+    while fringe:
+        _, d, v = heappop(fringe)
+        if done[v]:
+            continue
+        done[v] = 1
+        if v == t:
+            break
+        for e in range(indptr[v], indptr[v + 1]):
+            du = d + cost[e]
+            u = heads[e]
+            if du < seen[u] and h[u] < math.inf:
+                seen[u] = du
+                pred[u] = e
+                heappush(fringe, (du + h[u], du, u))
+
+    if not done[t]:
+        return None
+    path = []
+    v = t
+    while v != s:
+        e = pred[v]
+        path.append(e)
+        v = tails[e]
+    path.reverse()
+    return path
+
+
+def best_path(net: RoadNetwork, s: int, t: int, h=None):
+    """A* over landmark bounds h if given, else bidirectional Dijkstra."""
+    return shortest_path(net, s, t) if h is None else astar_path(net, s, t, h)
+
+
+def path_cost(net: RoadNetwork, path):
+    return sum(net.cost[e] for e in path)
+
+
+def route_one(net: RoadNetwork, s: int, t: int, h=None):
+    """Route one more vehicle s -> t along a cheapest marginal-cost path.
+
+    s and t are node indices into net.nodes; flow and marginal costs are
+    updated in place. Returns the edge ids of the chosen path.
+    """
+    path = best_path(net, s, t, h)
+    if path is None:
+        die(f"No path from {net.nodes[s]} to {net.nodes[t]}.")
+    for e in path:
+        net.add_flow(e, 1)
+    return path
+
+
+def compute_flow(G: nx.DiGraph, n: int, s, t, mode: str, landmarks: LandmarkIndex = None):
+    net = RoadNetwork(G, mode)
+    si, ti = net.index[s], net.index[t]
+    h = landmarks.heuristic(ti) if landmarks is not None else None
     for _ in range(n):
-        route_one(G, flow, s, t, mode)
-    return flow
+        route_one(net, si, ti, h)
+    return net.flow_dict()
+
+
+def equilibrate(net: RoadNetwork, paths, s: int, t: int, h=None):
+    """Best-response rounds until no vehicle can lower its own cost.
+
+    paths holds the edge ids used by each vehicle and is updated in place.
+    Vehicles are lifted off the network one at a time and moved to a
+    cheapest path if that is strictly cheaper than their current one.
+    Vehicles sharing a path are interchangeable, so each distinct path is
+    checked once per round. Every move lowers the Rosenthal potential (or,
+    in social mode, the total travel time), so the loop terminates.
+    Returns the number of moves made.
+    """
+    if h is None:
+        # Free-flow travel time to t is itself a consistent A* bound, and
+        # computing it once is cheap next to the searches below.
+        h = free_flow_distances(net, t, reverse=True)
+    fleet = collections.Counter(tuple(p) for p in paths)  # keeps first-seen order
+    moves = 0
+    changed = True
+    while changed:
+        changed = False
+        for path in list(fleet):
+            while fleet[path]:
+                for e in path:
+                    net.add_flow(e, -1)
+                new = best_path(net, s, t, h)
+                if new is not None:
+                    old_cost, new_cost = path_cost(net, path), path_cost(net, new)
+                    if old_cost - new_cost > 1e-9 * max(1.0, new_cost):
+                        fleet[path] -= 1
+                        fleet[tuple(new)] += 1
+                        for e in new:
+                            net.add_flow(e, 1)
+                        changed = True
+                        moves += 1
+                        continue
+                for e in path:
+                    net.add_flow(e, 1)
+                break
+    paths[:] = [list(p) for p, count in fleet.items() for _ in range(count)]
+    return moves
+
+
+def paths_from_flow(net: RoadNetwork, flow, s: int, t: int):
+    """Split an s -> t edge flow {(u, v): vehicles} into one edge-id path per vehicle."""
+    remaining = array("q", (flow.get(edge, 0) for edge in net.edges))
+    out_s = sum(remaining[e] for e in range(net.indptr[s], net.indptr[s + 1]))
+    in_s = sum(remaining[net.redges[i]] for i in range(net.rindptr[s], net.rindptr[s + 1]))
+    paths = []
+    for _ in range(out_s - in_s):
+        path, v = [], s
+        while v != t:
+            e = next((e for e in range(net.indptr[v], net.indptr[v + 1]) if remaining[e] > 0), None)
+            if e is None:
+                die(f"Flow is not a {net.nodes[s]} -> {net.nodes[t]} flow (stuck at {net.nodes[v]}).")
+            remaining[e] -= 1
+            path.append(e)
+            v = net.heads[e]
+        paths.append(path)
+    return paths
+
+
+def update_latencies(net: RoadNetwork, paths, changes, s: int, t: int, h=None):
+    """Give some edges new latency parameters and restore equilibrium.
+
+    changes maps edge id -> (a, b). The vehicles whose paths cross a changed
+    edge are re-routed first; equilibrate() then rebalances from there
+    instead of re-solving from zero flow. h must still be a lower bound
+    under the new parameters (lowering b can break landmark bounds).
+    Returns the number of vehicle moves.
+    """
+    for e, (a, b) in changes.items():
+        net.a[e], net.b[e] = float(a), float(b)
+        net.add_flow(e, 0)  # refresh the marginal cost
+    paths.sort(key=lambda p: not any(e in changes for e in p))
+    return equilibrate(net, paths, s, t, h)
+
+
+def reequilibrate(G: nx.DiGraph, flow, changes, s, t, mode: str):
+    """Flow after changing some edges' latencies, warm-started from flow.
+
+    flow is a previous result of compute_flow() and changes maps (u, v) to
+    the new (a, b). G's edge attributes are updated to match.
+    """
+    for (u, v), (a, b) in changes.items():
+        G[u][v]["a"], G[u][v]["b"] = a, b
+    net = RoadNetwork(G, mode)
+    si, ti = net.index[s], net.index[t]
+    paths = paths_from_flow(net, flow, si, ti)
+    for path in paths:
+        for e in path:
+            net.add_flow(e, 1)
+    edge_id = {edge: e for e, edge in enumerate(net.edges)}
+    update_latencies(net, paths, {edge_id[edge]: ab for edge, ab in changes.items()}, si, ti)
+    return net.flow_dict()
 
 
 def latency(a, b, x):  # l(x) = a*x + b
@@ -101,6 +536,172 @@ def total_travel_time(G: nx.DiGraph, flow):
     return tot
 
 
+def sweep_flow(net: RoadNetwork, n: int, n_max: int, s: int, t: int, h=None):
+    """Route max(n, n_max) vehicles one at a time on net.
+
+    Returns (curve, flow) where curve[k] is the total travel time after the
+    first k vehicles (k = 0..n_max) and flow is the edge flow after n.
+    Adding one vehicle to an edge carrying x changes x*l(x) by exactly the
+    social marginal cost a*(2x+1)+b, so the curve costs O(path) per step.
+    """
+    curve = [0.0]
+    flow = net.flow_dict() if n == 0 else None
+    for k in range(1, max(n, n_max) + 1):
+        path = route_one(net, s, t, h)
+        if k <= n_max:
+            curve.append(curve[-1] + sum(
+                marginal("social", net.a[e], net.b[e], net.flow[e] - 1) for e in path))
+        if k == n:
+            flow = net.flow_dict()
+    return curve, flow
+
+
+def _sweep_worker(G, mode, n, n_max, s, t, landmarks):
+    net = RoadNetwork(G, mode)
+    si, ti = net.index[s], net.index[t]
+    h = landmarks.heuristic(ti) if landmarks is not None else None
+    return sweep_flow(net, n, n_max, si, ti, h)
+
+
+def write_poa_curve(path: str, curve_eq, curve_so):
+    try:
+        with open(path, "w", newline="") as fh:
+            w = csv.writer(fh)
+            w.writerow(["n", "equilibrium_total", "social_total", "price_of_anarchy"])
+            for k, (eq, so) in enumerate(zip(curve_eq, curve_so)):
+                poa = f"{eq / so:.6g}" if so > 0 else ""
+                w.writerow([k, f"{eq:.6g}", f"{so:.6g}", poa])
+    except OSError as e:
+        die(f"Cannot write {path}: {e}")
+    print(f"Price-of-anarchy curve for n=0..{len(curve_eq) - 1} written to {path}")
+
+
+_braess = {}
+
+
+def _braess_init(net, paths, s, t, h):
+    _braess.update(net=net, paths=paths, s=s, t=t, h=h)
+
+
+def _braess_worker(e):
+    """Equilibrium total travel time with edge e removed, or None if that cuts s from t."""
+    net, s, t, h = _braess["net"].fork(), _braess["s"], _braess["t"], _braess["h"]
+    net.block(e)
+    if best_path(net, s, t, h) is None:
+        return e, None
+    paths = [list(p) for p in _braess["paths"]]
+    # Re-route the vehicles that were on e first, then rebalance everyone.
+    paths.sort(key=lambda p: e not in p)
+    equilibrate(net, paths, s, t, h)
+    return e, net.total_travel_time()
+
+
+def braess_edges(G: nx.DiGraph, n: int, s, t, landmarks: LandmarkIndex = None):
+    """Edges whose removal lowers the equilibrium total travel time.
+
+    The baseline greedy flow is first rebalanced to a Nash equilibrium. For
+    every edge it uses, a worker process masks the edge out of a fork of the
+    compiled network and re-equilibrates starting from the baseline paths.
+    Returns (baseline_total, [(edge, total_without_edge), ...]) sorted by
+    largest improvement first.
+    """
+    net = RoadNetwork(G, "equilibrium")
+    si, ti = net.index[s], net.index[t]
+    h = landmarks.heuristic(ti) if landmarks is not None else None
+    paths = [route_one(net, si, ti, h) for _ in range(n)]
+    equilibrate(net, paths, si, ti, h)
+    baseline = net.total_travel_time()
+
+    # Removing an edge nobody uses leaves the equilibrium unchanged.
+    used = [e for e in range(len(net.edges)) if net.flow[e] > 0]
+    found = []
+    with ProcessPoolExecutor(initializer=_braess_init,
+                             initargs=(net, paths, si, ti, h)) as pool:
+        for e, total in pool.map(_braess_worker, used, chunksize=max(1, len(used) // 64)):
+            if total is not None and baseline - total > 1e-9 * max(1.0, baseline):
+                found.append((net.edges[e], total))
+    found.sort(key=lambda item: item[1])
+    return baseline, found
+
+
+def print_braess(baseline, found):
+    print("\n=== Braess paradox edges ===")
+    print(f"Equilibrium total travel time: {baseline:g}")
+    if not found:
+        print("Removing any single edge does not lower the equilibrium travel time.")
+    for (u, v), total in found:
+        print(f"remove {u} -> {v}: total travel time {total:g}  (improvement {baseline - total:g})")
+
+
+def parse_update(G: nx.DiGraph, line: str):
+    """Parse an update line "u v a b" into ((u, v), (a, b)); raises ValueError."""
+    fields = line.split()
+    if len(fields) != 4:
+        raise ValueError("expected 'u v a b'")
+    u, v = find_node(G, fields[0]), find_node(G, fields[1])
+    if u is None or v is None or not G.has_edge(u, v):
+        raise ValueError(f"no edge {fields[0]} -> {fields[1]}")
+    a, b = float(fields[2]), float(fields[3])
+    if a < 0 or b < 0:
+        raise ValueError("a and b must be non-negative")
+    return (u, v), (a, b)
+
+
+def watch_updates(G: nx.DiGraph, source: str, n: int, s, t, landmarks: LandmarkIndex = None):
+    """Keep both flows at equilibrium while edge parameters change.
+
+    Reads "u v a b" lines from source (a file, or "-" for stdin) and after
+    each one re-routes only from the previous flows (update_latencies)
+    rather than from zero.
+    """
+    state = []
+    for mode in ("equilibrium", "social"):
+        net = RoadNetwork(G, mode)
+        si, ti = net.index[s], net.index[t]
+        h = landmarks.heuristic(ti) if landmarks is not None else None
+        paths = [route_one(net, si, ti, h) for _ in range(n)]
+        equilibrate(net, paths, si, ti, h)
+        state.append((mode, net, paths, h))
+    edge_id = {edge: e for e, edge in enumerate(state[0][1].edges)}
+    free_flow = array("d", state[0][1].b)  # what the landmark bounds were built on
+
+    print("\n=== Watching for edge updates (u v a b) ===")
+    for mode, net, _, _ in state:
+        print(f"{mode}: total travel time {net.total_travel_time():g}")
+    sys.stdout.flush()
+
+    fh = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        for lineno, line in enumerate(fh, 1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            try:
+                (u, v), (a, b) = parse_update(G, line)
+            except ValueError as e:
+                print(f"Warning: line {lineno}: {e}", file=sys.stderr)
+                continue
+            G[u][v]["a"], G[u][v]["b"] = a, b
+            e = edge_id[(u, v)]
+            print(f"update {u} -> {v}: a={a:g}, b={b:g}")
+            for i, (mode, net, paths, h) in enumerate(state):
+                if h is not None and b < free_flow[e]:
+                    # Landmark bounds assume b never drops; fall back to Dijkstra.
+                    h = None
+                    state[i] = (mode, net, paths, h)
+                before = array("q", net.flow)
+                start = time.perf_counter()
+                moves = update_latencies(net, paths, {e: (a, b)}, net.index[s], net.index[t], h)
+                ms = (time.perf_counter() - start) * 1000
+                shifted = ", ".join(f"{net.edges[k][0]}->{net.edges[k][1]}:{x}"
+                                    for k, x in enumerate(net.flow) if x != before[k])
+                print(f"  {mode}: {moves} moves in {ms:.2f} ms, total travel time "
+                      f"{net.total_travel_time():g}" + (f"  [{shifted}]" if shifted else ""))
+            sys.stdout.flush()
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+
 def print_report(title: str, G: nx.DiGraph, flow):
     print(f"\n=== {title} ===")
     for u, v, data in sorted(G.edges(data=True), key=lambda e: (str(e[0]), str(e[1]))):
@@ -148,16 +749,31 @@ def main():
     ap.add_argument("initial")
     ap.add_argument("final")
     ap.add_argument("--plot", action="store_true")
+    ap.add_argument("--landmarks", type=int, default=0, metavar="K",
+                    help="route with A* over K landmarks (index cached as <gml_file>.alt)")
+    ap.add_argument("--sweep", type=int, metavar="N_MAX",
+                    help="also record total travel time for every n up to N_MAX")
+    ap.add_argument("--csv", default="poa_curve.csv",
+                    help="output file for --sweep (default: poa_curve.csv)")
+    ap.add_argument("--braess", action="store_true",
+                    help="report edges whose removal lowers the equilibrium travel time")
+    ap.add_argument("--updates", metavar="FILE",
+                    help="then keep re-equilibrating as 'u v a b' edge updates arrive "
+                         "from FILE ('-' for stdin)")
     args = ap.parse_args()
 
     if args.n < 0:
         die("n must be >= 0")
+    if args.landmarks < 0:
+        die("--landmarks must be >= 0")
+    if args.sweep is not None and args.sweep < 0:
+        die("--sweep N_MAX must be >= 0")
 
     G = read_graph(args.gml_file)
     s = node_from_arg(G, args.initial)
     t = node_from_arg(G, args.final)
 
-    if s == t:
+    if s == t and args.sweep is None:
         # If start=end, simplest convention: nobody needs to move.
         flow0 = {(u, v): 0 for (u, v) in G.edges()}
         print_report("Travel equilibrium (Nash)", G, flow0)
@@ -166,12 +782,29 @@ def main():
             plot_all(G, args.n, flow0, flow0)
         return
 
-    flow_eq = compute_flow(G, args.n, s, t, "equilibrium")
-    flow_so = compute_flow(G, args.n, s, t, "social")
+    landmarks = load_landmarks(args.gml_file, G, args.landmarks) if args.landmarks else None
+    if args.sweep is not None:
+        # The two modes are independent greedy runs: one process each.
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            jobs = [pool.submit(_sweep_worker, G, mode, args.n, args.sweep, s, t, landmarks)
+                    for mode in ("equilibrium", "social")]
+            (curve_eq, flow_eq), (curve_so, flow_so) = [job.result() for job in jobs]
+        write_poa_curve(args.csv, curve_eq, curve_so)
+    else:
+        flow_eq = compute_flow(G, args.n, s, t, "equilibrium", landmarks)
+        flow_so = compute_flow(G, args.n, s, t, "social", landmarks)
 
     print_report("Travel equilibrium (Nash)", G, flow_eq)
     print_report("Social optimum", G, flow_so)
 
+    if args.braess:
+        print_braess(*braess_edges(G, args.n, s, t, landmarks))
+
+    if args.updates:
+        if args.updates != "-" and not os.path.exists(args.updates):
+            die(f"File not found: {args.updates}")
+        watch_updates(G, args.updates, args.n, s, t, landmarks)
+
     if args.plot:
         plot_all(G, args.n, flow_eq, flow_so)
 
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Synthetic market generator and clearing benchmark for market_strategy.py."""
+import argparse
+import csv
+import random
+import sys
+import time
+import tracemalloc
+import networkx as nx
+
+import market_strategy as ms
+from market_strategy import die
+
+DISTRIBUTIONS = ("uniform", "normal", "exponential", "correlated")
+ENGINES = ("rounds", "dense", "auction", "assignment")
+
+def generate_market(n_buyers, n_sellers, density=0.1, dist="uniform", vmax=100,
+                    ties=0.0, feasible=True, seed=None):
+    """Builds a random bipartite market in the format load_graph expects.
+
+    Buyers are 0..B-1 and sellers B..B+S-1. Each buyer values about
+    density * S sellers, drawn without replacement. Valuations are integers
+    in [0, vmax] drawn from dist:
+
+      uniform      every value equally likely
+      normal       centred on vmax / 2, sd vmax / 6
+      exponential  most values small, a long tail up to vmax
+      correlated   a shared seller quality plus per-buyer noise, so buyers
+                   compete for the same sellers (many rounds)
+
+    With probability ties, a valuation copies the buyer's first valuation,
+    which creates ties in the preferred-seller graph. If feasible is set,
+    buyer i always values seller i, so a perfect matching exists.
+    """
+    if dist not in DISTRIBUTIONS:
+        die(f"Unknown valuation distribution: {dist}")
+    if feasible and n_sellers < n_buyers:
+        die("A feasible market needs at least as many sellers as buyers.")
+    rng = random.Random(seed)
+    quality = [rng.random() for _ in range(n_sellers)]
+
+    def draw(j):
+        if dist == "uniform":
+            x = rng.random()
+        elif dist == "normal":
+            x = rng.gauss(0.5, 1 / 6)
+        elif dist == "exponential":
+            x = rng.expovariate(4.0)
+        else:
+            x = 0.7 * quality[j] + 0.3 * rng.random()
+        return min(vmax, max(0, round(x * vmax)))
+
+    G = nx.Graph()
+    G.add_nodes_from(range(n_buyers), bipartite=0)
+    G.add_nodes_from(range(n_buyers, n_buyers + n_sellers), bipartite=1)
+    k = min(n_sellers, max(1, round(density * n_sellers)))
+    for b in range(n_buyers):
+        cols = rng.sample(range(n_sellers), k)
+        if feasible and b not in cols:
+            cols[0] = b
+        first = None
+        for j in cols:
+            val = draw(j)
+            if first is None:
+                first = val
+            elif rng.random() < ties:
+                val = first
+            G.add_edge(b, n_buyers + j, valuation=val)
+    return G
+
+def run_engine(engine, valuations, bidders, buyers, sellers):
+    """Clears one market; returns (rounds, timings) for the round-based engines."""
+    timings = {}
+    if engine == "rounds":
+        _, _, _, rounds = ms.clear_by_rounds(valuations, bidders, buyers, sellers,
+                                             timings=timings)
+    elif engine == "dense":
+        _, _, _, rounds = ms.clear_dense(valuations, buyers, sellers, timings=timings)
+    elif engine == "auction":
+        ms.clear_by_auction(valuations, bidders, buyers, sellers)
+        rounds = None
+    else:
+        ms.clear_by_assignment(valuations, bidders, buyers, sellers)
+        rounds = None
+    return rounds, timings
+
+def bench_one(engine, G, repeat=1, memory=True):
+    """Benchmarks one engine on one market; timings are the best of repeat runs."""
+    buyers = [n for n, d in G.nodes(data=True) if d["bipartite"] == 0]
+    sellers = [n for n, d in G.nodes(data=True) if d["bipartite"] == 1]
+    valuations, bidders = ms.index_valuations(G, buyers, sellers)
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rounds, timings = run_engine(engine, valuations, bidders, buyers, sellers)
+        wall = time.perf_counter() - start
+        if best is None or wall < best[0]:
+            best = (wall, rounds, timings)
+    wall, rounds, timings = best
+
+    peak = None
+    if memory:
+        # A separate run: tracemalloc slows allocation-heavy code a lot.
+        tracemalloc.start()
+        run_engine(engine, valuations, bidders, buyers, sellers)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "engine": engine,
+        "buyers": len(buyers),
+        "sellers": len(sellers),
+        "edges": G.number_of_edges(),
+        "rounds": rounds,
+        "wall_s": wall,
+        "per_round_ms": 1000 * wall / rounds if rounds else None,
+        "preferred_s": timings.get("preferred"),
+        "matching_s": timings.get("matching"),
+        "constricted_s": timings.get("constricted"),
+        "peak_mb": peak / 2**20 if peak is not None else None,
+    }
+
+def _fmt(value, spec):
+    return "-" if value is None else format(value, spec)
+
+def print_results(rows):
+    """Prints benchmark rows as a fixed-width table."""
+    print(f"{'engine':<10} {'B':>7} {'S':>7} {'edges':>9} {'rounds':>7} {'wall s':>9} "
+          f"{'ms/round':>9} {'pref s':>8} {'match s':>8} {'constr s':>8} {'peak MB':>8}")
+    for r in rows:
+        print(f"{r['engine']:<10} {r['buyers']:>7} {r['sellers']:>7} {r['edges']:>9} "
+              f"{_fmt(r['rounds'], 'd'):>7} {r['wall_s']:>9.4f} "
+              f"{_fmt(r['per_round_ms'], '.3f'):>9} {_fmt(r['preferred_s'], '.4f'):>8} "
+              f"{_fmt(r['matching_s'], '.4f'):>8} {_fmt(r['constricted_s'], '.4f'):>8} "
+              f"{_fmt(r['peak_mb'], '.2f'):>8}")
+
+def parse_list(text, cast, name):
+    try:
+        values = [cast(x) for x in text.split(",") if x.strip()]
+    except ValueError:
+        die(f"--{name} must be a comma-separated list, got: {text}")
+    if not values:
+        die(f"--{name} must not be empty.")
+    return values
+
+def add_market_args(parser):
+    parser.add_argument("--density", type=float, default=0.1,
+                        help="Fraction of sellers each buyer values (default: 0.1)")
+    parser.add_argument("--dist", choices=DISTRIBUTIONS, default="uniform",
+                        help="Valuation distribution (default: uniform)")
+    parser.add_argument("--vmax", type=int, default=100, help="Largest valuation (default: 100)")
+    parser.add_argument("--ties", type=float, default=0.0,
+                        help="Probability a valuation repeats the buyer's first one (default: 0)")
+    parser.add_argument("--infeasible", action="store_true",
+                        help="Do not force a perfect matching to exist")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+
+def check_market_args(args):
+    if not 0 < args.density <= 1:
+        die("--density must be in (0, 1].")
+    if not 0 <= args.ties <= 1:
+        die("--ties must be in [0, 1].")
+    if args.vmax < 1:
+        die("--vmax must be at least 1.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic markets and clearing benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="Write a random market to a .gml file")
+    gen.add_argument("output", help="Path of the .gml file to write")
+    gen.add_argument("--buyers", type=int, required=True, help="Number of buyers")
+    gen.add_argument("--sellers", type=int, default=None,
+                     help="Number of sellers (default: same as buyers)")
+    add_market_args(gen)
+
+    bench = sub.add_parser("bench", help="Time the clearing engines over a size grid")
+    bench.add_argument("--sizes", default="100,300,1000",
+                       help="Comma-separated buyer counts (default: 100,300,1000)")
+    bench.add_argument("--seller_ratio", type=float, default=1.0,
+                       help="Sellers per buyer (default: 1.0)")
+    bench.add_argument("--engines", default="rounds",
+                       help=f"Comma-separated engines from {', '.join(ENGINES)} (default: rounds)")
+    bench.add_argument("--repeat", type=int, default=1,
+                       help="Runs per engine and size; the fastest is reported (default: 1)")
+    bench.add_argument("--no_memory", action="store_true",
+                       help="Skip the extra tracemalloc run that measures peak memory")
+    bench.add_argument("--output", default=None, help="Also write the results to this CSV file")
+    add_market_args(bench)
+    args = parser.parse_args()
+    check_market_args(args)
+
+    if args.command == "generate":
+        sellers = args.sellers if args.sellers is not None else args.buyers
+        if args.buyers < 1 or sellers < 1:
+            die("--buyers and --sellers must be at least 1.")
+        G = generate_market(args.buyers, sellers, args.density, args.dist, args.vmax,
+                            args.ties, not args.infeasible, args.seed)
+        nx.write_gml(G, args.output)
+        print(f"Wrote {args.output}: {args.buyers} buyers, {sellers} sellers, "
+              f"{G.number_of_edges()} edges")
+        return
+
+    sizes = parse_list(args.sizes, int, "sizes")
+    engines = parse_list(args.engines, str.strip, "engines")
+    for engine in engines:
+        if engine not in ENGINES:
+            die(f"Unknown engine: {engine}")
+    if min(sizes) < 1 or args.seller_ratio < 1 and not args.infeasible:
+        die("Sizes must be positive, and feasible markets need --seller_ratio >= 1.")
+    if args.repeat < 1:
+        die("--repeat must be at least 1.")
+
+    rows = []
+    for n in sizes:
+        n_sellers = max(1, round(n * args.seller_ratio))
+        G = generate_market(n, n_sellers, args.density, args.dist, args.vmax,
+                            args.ties, not args.infeasible, args.seed)
+        buyers = range(n)
+        valuations, _ = ms.index_valuations(G, buyers, range(n, n + n_sellers))
+        if not ms.has_perfect_matching(valuations, buyers):
+            print(f"Skipping B={n}: no perfect matching exists.", file=sys.stderr)
+            continue
+        for engine in engines:
+            rows.append(bench_one(engine, G, args.repeat, not args.no_memory))
+            print(f"  {engine} B={n}: {rows[-1]['wall_s']:.3f}s", file=sys.stderr)
+
+    print_results(rows)
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["engine"])
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
 #!/usr/bin/env python3
 import argparse
+import collections
+import contextlib
+import csv
+import glob
+import heapq
+import io
+import itertools
+import json
 import os
 import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 import networkx as nx
-import matplotlib.pyplot as plt
 
 def die(msg, code=2):
     """Exit the program with an error message."""
@@ -41,63 +51,784 @@ def load_graph(path):
             
     return G, buyers, sellers
 
-def get_preferred_graph(G, buyers, sellers, prices):
-    """Builds the preferred-seller graph based on maximum payoff."""
+def index_valuations(G, buyers, sellers):
+    """Reads every buyer's valuations once from the graph adjacency.
+    
+    Returns (valuations, bidders) where valuations[b] maps each seller adjacent
+    to buyer b to b's valuation of it, and bidders[s] lists the buyers adjacent
+    to seller s.
+    """
+    seller_set = set(sellers)
+    valuations = {b: {} for b in buyers}
+    bidders = {s: [] for s in sellers}
+    
+    for b in buyers:
+        # Handle directed or undirected edges; a b->s edge wins over s->b
+        if G.is_directed():
+            adjacent = [(s, d) for s, d in G.succ[b].items()]
+            adjacent += [(s, d) for s, d in G.pred[b].items() if s not in G.succ[b]]
+        else:
+            adjacent = G.adj[b].items()
+        for s, edge_data in adjacent:
+            if s in seller_set:
+                valuations[b][s] = edge_data.get('valuation', 0)
+                bidders[s].append(b)
+                
+    return valuations, bidders
+
+def best_sellers(b, valuations, prices, heaps=None):
+    """Returns the sellers giving buyer b its maximum payoff.
+    
+    Without `heaps` this scans all of b's valuations. With a `heaps` dict,
+    b keeps a lazy max-heap of (payoff, seller) entries stamped with the
+    price they were computed at. Prices only rise, so an entry whose stamp
+    is out of date can only overstate its payoff: it is re-pushed at the
+    current price when it surfaces. Finding the top sellers then costs
+    O(log S) per stale entry or tie instead of a scan over all sellers.
+    """
+    vals = valuations[b]
+    if not vals:
+        return []
+    if heaps is None:
+        max_payoff = max(val - prices[s] for s, val in vals.items())
+        # Allow minor floating-point tolerance
+        return [s for s, val in vals.items() if abs(val - prices[s] - max_payoff) < 1e-9]
+    
+    heap = heaps.get(b)
+    if heap is None:
+        heap = heaps[b] = [(prices[s] - val, i, s, prices[s])
+                           for i, (s, val) in enumerate(vals.items())]
+        heapq.heapify(heap)
+        
+    top = []
+    max_payoff = None
+    while heap:
+        neg_payoff, i, s, stamp = heap[0]
+        if stamp != prices[s]:
+            heapq.heapreplace(heap, (prices[s] - vals[s], i, s, prices[s]))
+            continue
+        if max_payoff is None:
+            max_payoff = -neg_payoff
+        elif max_payoff + neg_payoff >= 1e-9:
+            break
+        top.append(heapq.heappop(heap))
+    for entry in top:
+        heapq.heappush(heap, entry)
+    return [entry[2] for entry in top]
+
+def get_preferred_graph(valuations, bidders, prices):
+    """Builds the preferred-seller graph: each buyer joined to its best sellers."""
+    pref_G = nx.Graph()
+    pref_G.add_nodes_from(valuations, bipartite=0)
+    pref_G.add_nodes_from(bidders, bipartite=1)
+    for b in valuations:
+        pref_G.add_edges_from((b, s) for s in best_sellers(b, valuations, prices))
+    return pref_G
+
+def update_preferred(adj, vals, prices, raised=None, heaps=None):
+    """Builds or updates the preferred-seller graph on dense ids (see index_market).
+    
+    adj is a list of sets indexed by node id, holding each buyer's preferred
+    sellers and each seller's preferring buyers; prices is a list indexed by
+    seller id. Pass raised=None to fill adj for every buyer. Afterwards, pass
+    the sellers whose price was raised (prices must only rise). A buyer that
+    did not prefer any raised seller keeps the same preferred sellers. One
+    that still prefers some unraised seller keeps its maximum payoff and only
+    drops the raised ones. Only buyers whose every preferred seller was
+    raised need their new best sellers looked up (see best_sellers for
+    `heaps`). adj is updated in place.
+    
+    Returns the buyers whose edges changed.
+    """
+    if raised is None:
+        for b in range(len(vals)):
+            adj[b] = set(best_sellers(b, vals, prices, heaps))
+            for s in adj[b]:
+                adj[s].add(b)
+        return range(len(vals))
+    
+    stale = set()
+    for s in raised:
+        stale.update(adj[s])
+        for b in adj[s]:
+            adj[b].discard(s)
+        adj[s] = set()
+    for b in stale:
+        if not adj[b]:
+            # Every preferred seller was raised, so b's maximum payoff dropped
+            adj[b] = set(best_sellers(b, vals, prices, heaps))
+            for s in adj[b]:
+                adj[s].add(b)
+    return stale
+
+def index_market(valuations, bidders, buyers, sellers):
+    """Re-indexes a market to dense integer ids.
+    
+    Buyer buyers[i] becomes i and seller sellers[j] becomes B + j, so buyers
+    and sellers share one id space and per-node state fits in flat lists.
+    Returns (vals, bids): vals[i] maps seller ids to buyer i's valuations and
+    bids[B + j] lists the buyer ids adjacent to seller j.
+    """
+    B = len(buyers)
+    sid = {s: B + j for j, s in enumerate(sellers)}
+    bid = {b: i for i, b in enumerate(buyers)}
+    vals = [{sid[s]: val for s, val in valuations[b].items()} for b in buyers]
+    bids = [[] for _ in range(B)] + [[bid[b] for b in bidders[s]] for s in sellers]
+    return vals, bids
+
+class PreferredMatching:
+    """Maximum matching on the preferred-seller graph, kept across rounds.
+    
+    Buyers are the ids 0..B-1 and sellers B..n-1 (see index_market). `mate`
+    is a list holding each node's partner, or -1 if it is unmatched. Each
+    round, update() drops only the matched edges that stopped being preferred
+    and then runs Hopcroft-Karp phases from the unmatched buyers alone. The
+    last phase, which finds no augmenting path, has explored exactly the
+    alternating tree of the unmatched buyers: that is the constricted set.
+    
+    Visited marks are stamped with a phase counter, so starting a search
+    costs nothing and each phase is O(edges explored).
+    """
+    
+    def __init__(self, n_buyers, n_nodes):
+        self.mate = [-1] * n_nodes
+        self.unmatched = set(range(n_buyers))
+        self.constricted = (set(), set())
+        self.dist = [0] * n_buyers
+        self.seen = array("q", bytes(8 * n_nodes))
+        self.stamp = 0
+        
+    def update(self, adj, stale):
+        """Repairs the matching after the edges of the `stale` buyers changed.
+        
+        `adj[b]` holds buyer b's preferred seller ids.
+        """
+        mate = self.mate
+        for b in stale:
+            s = mate[b]
+            if s >= 0 and s not in adj[b]:
+                mate[b] = mate[s] = -1
+                self.unmatched.add(b)
+                
+        while self.unmatched:
+            limit, reached_buyers, reached_sellers = self._layers(adj)
+            if limit is None:
+                self.constricted = (set(reached_buyers), set(reached_sellers))
+                return
+            for b in list(self.unmatched):
+                self._augment(b, adj, limit)
+        self.constricted = (set(), set())
+        
+    def _layers(self, adj):
+        """Layered BFS over alternating paths from the unmatched buyers.
+        
+        Fills self.dist for every reached buyer and returns (limit,
+        reached_buyers, reached_sellers): the layer at which a free seller is
+        first reached (None if there is no augmenting path) and the lists of
+        buyers and sellers reached.
+        """
+        mate, dist, seen = self.mate, self.dist, self.seen
+        self.stamp += 1
+        stamp = self.stamp
+        frontier = list(self.unmatched)
+        for b in frontier:
+            seen[b] = stamp
+            dist[b] = 0
+        reached_buyers = list(frontier)
+        reached_sellers = []
+        limit = None
+        level = 0
+        while frontier and limit is None:
+            level += 1
+            nxt = []
+            for b in frontier:
+                for s in adj[b]:
+                    if seen[s] == stamp:
+                        continue
+                    seen[s] = stamp
+                    reached_sellers.append(s)
+                    m = mate[s]
+                    if m < 0:
+                        limit = level
+                    elif seen[m] != stamp:
+                        seen[m] = stamp
+                        dist[m] = level
+                        nxt.append(m)
+            reached_buyers += nxt
+            frontier = nxt
+        return limit, reached_buyers, reached_sellers
+        
+    def _augment(self, root, adj, limit):
+        """Iterative DFS for a shortest augmenting path from `root` along the BFS layers."""
+        mate, dist, seen, stamp = self.mate, self.dist, self.seen, self.stamp
+        stack = [(root, iter(adj[root]))]
+        path = []  # path[i] is the seller taken from stack[i]'s buyer
+        while stack:
+            b, neighbors = stack[-1]
+            for s in neighbors:
+                m = mate[s]
+                if m < 0:
+                    if dist[b] + 1 == limit:
+                        # Flip the path: each buyer on the stack takes the next seller
+                        for (bb, _), ss in zip(stack, path + [s]):
+                            mate[bb] = ss
+                            mate[ss] = bb
+                        self.unmatched.discard(root)
+                        return True
+                elif seen[m] == stamp and dist[m] == dist[b] + 1:
+                    path.append(s)
+                    stack.append((m, iter(adj[m])))
+                    break
+            else:
+                # Dead end: no later search in this phase needs to enter b again
+                dist[b] = -1
+                stack.pop()
+                if path:
+                    path.pop()
+        return False
+
+def find_constricted_set(matcher):
+    """Returns the constricted buyers and sellers found by the last matching update.
+    
+    Once no augmenting path remains, the alternating tree grown from the
+    unmatched buyers by PreferredMatching is the constricted set, so no
+    separate search is needed.
+    """
+    return matcher.constricted
+
+def is_integral(valuations):
+    """True if every valuation is a whole number."""
+    return all(float(v).is_integer() for vals in valuations.values() for v in vals.values())
+
+def minimal_prices(valuations, bidders, assignment, integral, potentials=None):
+    """Smallest non-negative prices that make `assignment` market-clearing.
+    
+    Buyer b must weakly prefer its seller j = assignment[b] to every adjacent
+    seller s, i.e. p_s >= p_j - v(b, j) + v(b, s). Starting from zero and
+    raising prices only as far as these constraints force (a longest-path
+    problem over sellers) gives the minimal Walrasian prices, which is what
+    the unit-increment rounds reach for integer valuations. A solution only
+    exists if the assignment maximizes total valuation.
+    
+    With `potentials`, any clearing prices for the assignment (such as the
+    dual prices of sap_assignment), every constraint has non-negative slack
+    against them, so Dijkstra on the reduced costs solves it in
+    O(E log S). Otherwise FIFO Bellman-Ford is used, which settles within
+    one pass per seller.
+    """
+    owner = {j: b for b, j in assignment.items()}
+    if potentials is not None:
+        prices = _minimal_prices_dijkstra(valuations, bidders, owner, potentials)
+    else:
+        prices = None
+    if prices is None:
+        prices = _minimal_prices_bellman_ford(valuations, bidders, owner)
+    if integral:
+        prices = {s: int(round(p)) for s, p in prices.items()}
+    return prices
+
+def _minimal_prices_bellman_ford(valuations, bidders, owner):
+    """Longest-path relaxation in FIFO passes; dies on a positive cycle."""
+    prices = {s: 0 for s in bidders}
+    worklist = collections.deque(owner)
+    queued = set(owner)
+    worklist.append(None)   # marks the end of a pass
+    passes = 0
+    while len(worklist) > 1:
+        j = worklist.popleft()
+        if j is None:
+            passes += 1
+            if passes > len(bidders):
+                die("Internal: assignment is not optimal, cannot derive clearing prices.", 1)
+            worklist.append(None)
+            continue
+        queued.discard(j)
+        b = owner[j]
+        vals = valuations[b]
+        for s, val in vals.items():
+            floor = prices[j] - vals[j] + val
+            if floor > prices[s] + 1e-9:
+                prices[s] = floor
+                if s in owner and s not in queued:
+                    queued.add(s)
+                    worklist.append(s)
+    return prices
+
+def _minimal_prices_dijkstra(valuations, bidders, owner, potentials):
+    """The same longest paths by Dijkstra, with clearing prices as potentials.
+    
+    In terms of d(s) = potentials[s] - p_s the constraint along j -> s reads
+    d(s) <= d(j) + slack, where slack = (v(b, j) - p*_j) - (v(b, s) - p*_s)
+    >= 0, and d(s) <= potentials[s] since p_s >= 0. The minimal prices come
+    from the largest feasible d, a shortest-path problem starting from those
+    bounds. Returns None if the potentials do not clear the assignment.
+    """
+    dist = {s: potentials[s] for s in bidders}
+    heap = [(d, i, s) for i, (s, d) in enumerate(dist.items())]
+    heapq.heapify(heap)
+    order = {s: i for i, s in enumerate(dist)}
+    done = set()
+    while heap:
+        d, _, j = heapq.heappop(heap)
+        if j in done:
+            continue
+        done.add(j)
+        b = owner.get(j)
+        if b is None:
+            continue
+        vals = valuations[b]
+        surplus = vals[j] - potentials[j]
+        for s, val in vals.items():
+            slack = surplus - (val - potentials[s])
+            if slack < -1e-9:
+                return None
+            nd = d + max(slack, 0)
+            if nd < dist[s] - 1e-12:
+                dist[s] = nd
+                heapq.heappush(heap, (nd, order[s], s))
+    return {s: max(potentials[s] - dist[s], 0) for s in bidders}
+
+def has_perfect_matching(valuations, buyers):
+    """Whether every buyer can be given a distinct adjacent seller (Hall's condition)."""
+    sellers = list({s for b in buyers for s in valuations[b]})
+    vals, _ = index_market(valuations, {s: () for s in sellers}, buyers, sellers)
+    matcher = PreferredMatching(len(buyers), len(buyers) + len(sellers))
+    matcher.update(vals, ())
+    return not matcher.unmatched
+
+def _preview(items, limit=10):
+    """Formats at most limit items of a collection, noting how many were left out."""
+    items = sorted(items, key=str)
+    shown = ", ".join(str(x) for x in items[:limit])
+    if len(items) > limit:
+        shown += f", ... (+{len(items) - limit} more)"
+    return f"[{shown}]"
+
+class RoundTrace:
+    """Compact per-round records of a clear_by_rounds run, as JSON lines.
+    
+    A record is written every `every` rounds and for the final round. Each
+    holds the round number, matching size, constricted-set sizes, the price
+    changes since the previous record as [seller, delta] pairs, and the
+    seconds spent in each step of that round.
+    """
+    def __init__(self, path, every=1):
+        try:
+            self.file = open(path, "w")
+        except OSError as e:
+            die(f"Cannot write trace file {path}: {e}")
+        self.path = path
+        self.every = every
+        self.deltas = {}
+        self.records = 0
+        self.rounds = 0
+        self.max_constricted = 0
+        
+    def round(self, round_num, matched, constricted_b, constricted_s, t_pref, t_match, t_cons):
+        """Records one round; constricted_s are the sellers about to be raised."""
+        self.rounds = round_num
+        self.max_constricted = max(self.max_constricted, len(constricted_b))
+        for s in constricted_s:
+            self.deltas[s] = self.deltas.get(s, 0) + 1
+        final = not constricted_s
+        if round_num % self.every and not final:
+            return
+        record = {
+            "round": round_num,
+            "matched": matched,
+            "constricted_buyers": len(constricted_b),
+            "constricted_sellers": len(constricted_s),
+            "price_deltas": [[s, d] for s, d in self.deltas.items()],
+            "t_pref": round(t_pref, 7),
+            "t_match": round(t_match, 7),
+            "t_cons": round(t_cons, 7),
+        }
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.deltas = {}
+        self.records += 1
+        
+    def close(self):
+        self.file.close()
+        
+def clear_by_rounds(valuations, bidders, buyers, sellers, interactive=False, timings=None,
+                    trace=None):
+    """Unit-increment market clearing: raise constricted sellers' prices by 1 per round.
+    
+    The rounds run on dense integer ids (index_market); labels are only
+    restored for output. If a timings dict is given, the seconds spent
+    building the preferred graph, repairing the matching and reading the
+    constricted set are added to its 'preferred', 'matching' and
+    'constricted' keys. A RoundTrace, if given, receives one call per round.
+    
+    Returns (prices, matching, pref_G, rounds).
+    """
+    B = len(buyers)
+    n = B + len(sellers)
+    labels = list(buyers) + list(sellers)
+    vals, _ = index_market(valuations, bidders, buyers, sellers)
+    
+    # Initialize prices for all sellers to 0 (buyer slots are unused)
+    prices = [0] * n
+    adj = [set() for _ in range(n)]
+    
+    round_num = 1
+    raised = None
+    heaps = {}
+    matcher = PreferredMatching(B, n)
+    t_pref = t_match = t_cons = 0.0
+    clock = time.perf_counter
+    
+    while True:
+        t0 = clock()
+        # Step 1: Update the preferred-seller graph (only buyers that preferred
+        # a seller whose price was raised last round are re-evaluated)
+        stale = update_preferred(adj, vals, prices, raised, heaps)
+        t1 = clock()
+        dt_pref = t1 - t0
+        
+        # Step 2: Repair the previous round's maximum matching
+        matcher.update(adj, stale)
+        dt_match = clock() - t1
+        t_pref += dt_pref
+        t_match += dt_match
+        matched = B - len(matcher.unmatched)
+        
+        if interactive:
+            print(f"--- Round {round_num} ---")
+            print(f"Matched Buyers: {matched}/{B}")
+            
+        # Step 3: Check for perfect matching
+        if not matcher.unmatched:
+            if trace is not None:
+                trace.round(round_num, matched, (), (), dt_pref, dt_match, 0.0)
+            if interactive:
+                print("-> Market Cleared! Perfect matching found.\n")
+            break
+            
+        # Step 4: Compute constricted sets and update valuation
+        t0 = clock()
+        constricted_b, constricted_s = find_constricted_set(matcher)
+        dt_cons = clock() - t0
+        t_cons += dt_cons
+        
+        if trace is not None:
+            trace.round(round_num, matched, constricted_b, [labels[s] for s in constricted_s],
+                        dt_pref, dt_match, dt_cons)
+        if interactive:
+            print(f"Constricted Buyers Set ({len(constricted_b)}): "
+                  f"{_preview([labels[b] for b in constricted_b])}")
+            print(f"Constricted Sellers Set ({len(constricted_s)}): "
+                  f"{_preview([labels[s] for s in constricted_s])}")
+            print(f"Action: Increasing price of constricted sellers by 1.\n")
+            
+        for s in constricted_s:
+            prices[s] += 1
+        raised = constricted_s
+            
+        round_num += 1
+        
+    if timings is not None:
+        timings["preferred"] = timings.get("preferred", 0.0) + t_pref
+        timings["matching"] = timings.get("matching", 0.0) + t_match
+        timings["constricted"] = timings.get("constricted", 0.0) + t_cons
+        
+    mate = matcher.mate
+    matching = {}
+    for i in range(B):
+        matching[labels[i]] = labels[mate[i]]
+        matching[labels[mate[i]]] = labels[i]
     pref_G = nx.Graph()
     pref_G.add_nodes_from(buyers, bipartite=0)
     pref_G.add_nodes_from(sellers, bipartite=1)
+    pref_G.add_edges_from((labels[i], labels[s]) for i in range(B) for s in adj[i])
+    return {labels[s]: prices[s] for s in range(B, n)}, matching, pref_G, round_num
+
+def clear_dense(valuations, buyers, sellers, timings=None):
+    """Unit-increment market clearing on a dense B x S valuation matrix (NumPy).
     
-    for b in buyers:
-        max_payoff = -float('inf')
-        
-        # 1. Determine maximum payoff for buyer b
-        for s in sellers:
-            if G.has_edge(b, s) or G.has_edge(s, b):
-                # Handle directed or undirected edge
-                edge_data = G.get_edge_data(b, s) or G.get_edge_data(s, b)
-                val = edge_data.get('valuation', 0)
-                payoff = val - prices[s]
-                if payoff > max_payoff:
-                    max_payoff = payoff
-                    
-        # 2. Add edges for all sellers providing this max payoff
-        for s in sellers:
-            if G.has_edge(b, s) or G.has_edge(s, b):
-                edge_data = G.get_edge_data(b, s) or G.get_edge_data(s, b)
-                val = edge_data.get('valuation', 0)
-                payoff = val - prices[s]
-                # Allow minor floating-point tolerance
-                if abs(payoff - max_payoff) < 1e-9:
-                    pref_G.add_edge(b, s)
-                    
-    return pref_G
+    Same rounds and prices as clear_by_rounds, but payoffs V - prices, the
+    per-buyer row maxima and the preferred-edge mask are all vectorized.
+    After the constricted sellers C are raised by 1, a constricted buyer's
+    preferred sellers all lie in C, so only those rows are recomputed in
+    full; every other buyer keeps its maximum and just loses the columns
+    in C. Sellers are numbered B + j so they share the matcher's id space.
+    timings is filled in as for clear_by_rounds.
+    
+    Returns (prices, matching, pref_G, rounds).
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        die("NumPy is required for --engine dense.  Run:  pip install numpy")
+        
+    clock = time.perf_counter
+    t0 = clock()
+    B, S = len(buyers), len(sellers)
+    col = {s: j for j, s in enumerate(sellers)}
+    V = np.full((B, S), -np.inf)
+    for i, b in enumerate(buyers):
+        for s, val in valuations[b].items():
+            V[i, col[s]] = val
+    prices = np.zeros(S)
+    
+    # Step 1 for every buyer: payoffs, row maxima and the preferred mask
+    payoff = V - prices
+    row_max = payoff.max(axis=1)
+    mask = np.abs(payoff - row_max[:, None]) < 1e-9
+    adj = [set((np.flatnonzero(mask[i]) + B).tolist()) for i in range(B)]
+    stale = range(B)
+    
+    matcher = PreferredMatching(B, B + S)
+    t_pref, t_match, t_cons = clock() - t0, 0.0, 0.0
+    rounds = 1
+    while True:
+        # Step 2: Repair the previous round's maximum matching
+        t0 = clock()
+        matcher.update(adj, stale)
+        t1 = clock()
+        t_match += t1 - t0
+        if not matcher.unmatched:
+            break
+            
+        # Step 3: Raise the constricted sellers' prices by 1
+        constricted_b, constricted_s = find_constricted_set(matcher)
+        t0 = clock()
+        t_cons += t0 - t1
+        rows = np.fromiter(constricted_b, dtype=np.intp, count=len(constricted_b))
+        cols = np.fromiter((j - B for j in constricted_s), dtype=np.intp, count=len(constricted_s))
+        prices[cols] += 1
+        
+        # Step 1 for the next round, touching only what the raise can change
+        losing = np.flatnonzero(mask[:, cols].any(axis=1))
+        mask[np.ix_(losing, cols)] = False
+        payoff = V[rows] - prices
+        row_max[rows] = payoff.max(axis=1)
+        mask[rows] = np.abs(payoff - row_max[rows][:, None]) < 1e-9
+        
+        raised = set(constricted_s)
+        for i in losing.tolist():
+            adj[i] -= raised
+        for i in rows.tolist():
+            adj[i] = set((np.flatnonzero(mask[i]) + B).tolist())
+        stale = set(losing.tolist()) | constricted_b
+        t_pref += clock() - t0
+        rounds += 1
+        
+    if timings is not None:
+        timings["preferred"] = timings.get("preferred", 0.0) + t_pref
+        timings["matching"] = timings.get("matching", 0.0) + t_match
+        timings["constricted"] = timings.get("constricted", 0.0) + t_cons
+    integral = is_integral(valuations)
+    prices = {s: (int(p) if integral else float(p)) for s, p in zip(sellers, prices.tolist())}
+    matching = {}
+    for i, b in enumerate(buyers):
+        matching[b] = sellers[matcher.mate[i] - B]
+        matching[matching[b]] = b
+    pref_G = nx.Graph()
+    pref_G.add_nodes_from(buyers, bipartite=0)
+    pref_G.add_nodes_from(sellers, bipartite=1)
+    pref_G.add_edges_from((buyers[i], sellers[j - B]) for i in range(B) for j in adj[i])
+    return prices, matching, pref_G, rounds
 
-def find_constricted_set(pref_G, matching, buyers, sellers):
-    """Finds a constricted set of buyers and their neighbors using alternating paths."""
-    matched_buyers = {k for k in matching.keys() if k in buyers}
-    unmatched_buyers = set(buyers) - matched_buyers
-    
-    visited_buyers = set(unmatched_buyers)
-    visited_sellers = set()
-    
-    queue = list(unmatched_buyers)
-    
-    # BFS to find the alternating tree from unmatched buyers
-    while queue:
-        curr_b = queue.pop(0)
-        for s in pref_G.neighbors(curr_b):
-            if s not in visited_sellers:
-                visited_sellers.add(s)
-                match_b = matching.get(s)
-                if match_b is not None and match_b not in visited_buyers:
-                    visited_buyers.add(match_b)
-                    queue.append(match_b)
-                    
-    return visited_buyers, visited_sellers
+def auction_assignment(valuations, buyers, sellers, integral):
+    """Bertsekas forward auction with epsilon scaling.
+    
+    Unassigned buyers bid for their best seller, raising its price by the
+    gap to their second-best payoff plus epsilon and evicting its previous
+    owner. Each phase ends with every buyer assigned under epsilon-complementary
+    slackness; epsilon is then divided by 4 and the next phase starts from
+    the current prices. Once epsilon < 1/n with integer valuations, the
+    assignment is optimal. When there are more sellers than buyers, dummy
+    buyers valuing every seller at 0 (their bids go to the cheapest sellers)
+    make the problem square.
+    
+    Returns (assignment, bids, phases).
+    """
+    n = len(sellers)
+    C = max([abs(v) for vals in valuations.values() for v in vals.values()] + [1])
+    final_eps = 1.0 / (n + 1) if integral else 1e-9 * C / n
+    eps = max(C / 4, final_eps)
+    prices = {s: 0.0 for s in sellers}
+    dummies = [object() for _ in range(n - len(buyers))]
+    is_dummy = set(dummies)
+    cheapest = [(0.0, i, s) for i, s in enumerate(sellers)]  # lazy min-heap of prices
+    order = {s: i for i, s in enumerate(sellers)}
+    bids = phases = 0
+    
+    while True:
+        phases += 1
+        owner = {}
+        assigned = {}
+        queue = list(buyers) + dummies
+        while queue:
+            b = queue.pop()
+            best = None
+            w1 = w2 = -float('inf')
+            if b in is_dummy:
+                # Dummy buyer: the two cheapest sellers, skipping stale heap entries
+                while cheapest[0][0] != prices[cheapest[0][2]]:
+                    heapq.heappop(cheapest)
+                top = heapq.heappop(cheapest)
+                best, w1 = top[2], -top[0]
+                while cheapest and cheapest[0][0] != prices[cheapest[0][2]]:
+                    heapq.heappop(cheapest)
+                if cheapest:
+                    w2 = -cheapest[0][0]
+                heapq.heappush(cheapest, top)
+            else:
+                for s, val in valuations[b].items():
+                    payoff = val - prices[s]
+                    if payoff > w1:
+                        best, w1, w2 = s, payoff, w1
+                    elif payoff > w2:
+                        w2 = payoff
+            if w2 == -float('inf'):
+                # Only one option: any raise keeps b's slackness, so make it decisive
+                w2 = w1 - C
+                
+            prices[best] += w1 - w2 + eps
+            heapq.heappush(cheapest, (prices[best], order[best], best))
+            bids += 1
+            prev = owner.get(best)
+            if prev is not None:
+                del assigned[prev]
+                queue.append(prev)
+            owner[best] = b
+            assigned[b] = best
+            
+        if eps <= final_eps:
+            break
+        eps = max(eps / 4, final_eps)
+        
+    return {b: assigned[b] for b in buyers}, bids, phases
+
+def clear_by_auction(valuations, bidders, buyers, sellers):
+    """Market clearing via the epsilon-scaling auction.
+    
+    The auction finds a welfare-maximizing assignment; its prices are then
+    normalized to the minimal Walrasian prices so they are comparable to the
+    unit-increment rounds. Returns (prices, matching, pref_G, bids, phases).
+    """
+    integral = is_integral(valuations)
+    assignment, bids, phases = auction_assignment(valuations, buyers, sellers, integral)
+    prices = minimal_prices(valuations, bidders, assignment, integral)
+    pref_G = get_preferred_graph(valuations, bidders, prices)
+    matching = dict(assignment)
+    matching.update((s, b) for b, s in assignment.items())
+    return prices, matching, pref_G, bids, phases
+
+def sap_assignment(valuations, buyers, sellers):
+    """Maximum-valuation assignment by successive shortest augmenting paths.
+    
+    A sparse Jonker-Volgenant style solver on costs c(b, s) = -v(b, s) with
+    dual variables u (buyers) and w (sellers) keeping every reduced cost
+    c - u - w non-negative and matched edges at zero. Each unassigned buyer
+    runs one Dijkstra over reduced costs to the nearest free seller; the
+    duals are then shifted so the augmented path stays tight. Sellers that
+    are never reached keep w = 0, which keeps surplus sellers optimal.
+    
+    Returns (assignment, prices) where prices = -w are the dual prices, a
+    market-clearing (though not necessarily minimal) price vector.
+    """
+    u = {b: -max(vals.values()) for b, vals in valuations.items()}
+    w = {s: 0 for s in sellers}
+    owner = {}
+    assignment = {}
+    tiebreak = itertools.count()
+    
+    for root in buyers:
+        dist = {}
+        done = {}   # settled seller -> distance
+        pred = {}   # seller -> buyer it was reached from
+        fringe = []
+        b, base = root, 0
+        while True:
+            for s, val in valuations[b].items():
+                if s in done:
+                    continue
+                d = base - val - u[b] - w[s]
+                if s not in dist or d < dist[s]:
+                    dist[s] = d
+                    pred[s] = b
+                    heapq.heappush(fringe, (d, next(tiebreak), s))
+            while fringe and fringe[0][2] in done:
+                heapq.heappop(fringe)
+            if not fringe:
+                die("No market-clearing matching exists: some set of buyers is adjacent to fewer sellers.")
+            base, _, s = heapq.heappop(fringe)
+            done[s] = base
+            b = owner.get(s)
+            if b is None:
+                free, D = s, base
+                break
+                
+        # Shift the duals of the search tree so the path becomes tight
+        for s, d in done.items():
+            if s != free:
+                w[s] -= D - d
+                u[owner[s]] += D - d
+        u[root] += D
+        
+        # Flip the path back from the free seller to the root
+        s = free
+        while True:
+            b = pred[s]
+            prev = assignment.get(b)
+            assignment[b] = s
+            owner[s] = b
+            if b == root:
+                break
+            s = prev
+            
+    return assignment, {s: -ws for s, ws in w.items()}
+
+def dense_assignment(valuations, buyers, sellers):
+    """Maximum-valuation assignment via SciPy's O(n^3) Jonker-Volgenant solver.
+    
+    Returns the assignment, or None when SciPy/NumPy are not installed.
+    """
+    try:
+        import numpy as np
+        from scipy.optimize import linear_sum_assignment
+    except ImportError:
+        return None
+    col = {s: j for j, s in enumerate(sellers)}
+    cost = np.full((len(buyers), len(sellers)), np.inf)
+    for i, b in enumerate(buyers):
+        for s, val in valuations[b].items():
+            cost[i, col[s]] = -val
+    rows, cols = linear_sum_assignment(cost)
+    return {buyers[i]: sellers[j] for i, j in zip(rows.tolist(), cols.tolist())}
+
+def clear_by_assignment(valuations, bidders, buyers, sellers):
+    """Market clearing solved directly as a maximum-weight assignment.
+    
+    Dense markets (at least half of all buyer-seller pairs valued) go to
+    SciPy's dense solver when it is installed; otherwise the sparse
+    shortest-augmenting-path solver is used, whose dual prices certify the
+    assignment. Prices are then normalized to the minimal Walrasian prices
+    the round-based algorithm finds. Returns (prices, matching, pref_G, solver),
+    where solver describes which solver ran.
+    """
+    assignment = None
+    if 2 * sum(map(len, valuations.values())) >= len(buyers) * len(sellers):
+        assignment = dense_assignment(valuations, buyers, sellers)
+    potentials = None
+    solver = "SciPy linear_sum_assignment"
+    if assignment is None:
+        assignment, potentials = sap_assignment(valuations, buyers, sellers)
+        solver = f"{len(buyers)} shortest augmenting paths"
+    prices = minimal_prices(valuations, bidders, assignment, is_integral(valuations),
+                            potentials)
+    pref_G = get_preferred_graph(valuations, bidders, prices)
+    matching = dict(assignment)
+    matching.update((s, b) for b, s in assignment.items())
+    return prices, matching, pref_G, solver
 
 def plot_graph(G, pref_G, matching, buyers, sellers, prices):
     """Plots the preferred-seller graph and highlights the matching."""
     pos = nx.bipartite_layout(G, buyers)
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(10, 6))
     
     # Draw Nodes
@@ -133,61 +864,173 @@ def plot_graph(G, pref_G, matching, buyers, sellers, prices):
     
     plt.show()
 
+def clear_market(valuations, bidders, buyers, sellers, engine="rounds", interactive=False,
+                 trace=None):
+    """Clears a market with the chosen engine.
+
+    Returns (prices, matching, pref_G, rounds, summary). rounds is None for the
+    engines that do not work in unit-increment rounds.
+    """
+    rounds = None
+    if engine == "assignment":
+        prices, matching, pref_G, solver = clear_by_assignment(valuations, bidders, buyers,
+                                                               sellers)
+        summary = f"Solved as an assignment problem ({solver})"
+    elif engine == "dense":
+        prices, matching, pref_G, rounds = clear_dense(valuations, buyers, sellers)
+        summary = f"Total Rounds: {rounds}"
+    elif engine == "auction":
+        prices, matching, pref_G, bids, phases = clear_by_auction(valuations, bidders, buyers, sellers)
+        summary = f"Total Bids: {bids} ({phases} epsilon-scaling phases)"
+    else:
+        prices, matching, pref_G, rounds = clear_by_rounds(
+            valuations, bidders, buyers, sellers, interactive, trace=trace)
+        summary = f"Total Rounds: {rounds}"
+    return prices, matching, pref_G, rounds, summary
+
+def batch_files(pattern):
+    """Expands a directory or glob pattern into a sorted list of GML files."""
+    if os.path.isdir(pattern):
+        files = glob.glob(os.path.join(pattern, "*.gml"))
+    else:
+        files = glob.glob(pattern)
+    return sorted(f for f in files if os.path.isfile(f))
+
+def _batch_worker(task):
+    """Loads and clears one market file; errors are recorded, not raised."""
+    path, engine = task
+    record = {"file": path, "engine": engine}
+    stderr = io.StringIO()
+    start = time.perf_counter()
+    try:
+        # die() prints and exits; capture both so one bad file does not stop the batch.
+        with contextlib.redirect_stderr(stderr):
+            G, buyers, sellers = load_graph(path)
+            valuations, bidders = index_valuations(G, buyers, sellers)
+            if not has_perfect_matching(valuations, buyers):
+                die("No market-clearing matching exists: some set of buyers is adjacent to fewer sellers.")
+            prices, matching, _, rounds, summary = clear_market(
+                valuations, bidders, buyers, sellers, engine)
+    except SystemExit:
+        message = stderr.getvalue().strip()
+        if message.startswith("Error: "):
+            message = message[len("Error: "):]
+        record["error"] = message or "failed"
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    else:
+        record["buyers"] = len(buyers)
+        record["sellers"] = len(sellers)
+        record["rounds"] = rounds
+        record["summary"] = summary
+        record["prices"] = {str(s): p for s, p in prices.items()}
+        record["matching"] = {str(b): matching[b] for b in buyers}
+    record["seconds"] = round(time.perf_counter() - start, 6)
+    return record
+
+def write_batch(records, out_path):
+    """Writes batch results as JSON lines, or as CSV if out_path ends in .csv."""
+    with open(out_path, "w", newline="") as f:
+        if out_path.lower().endswith(".csv"):
+            fields = ["file", "engine", "buyers", "sellers", "rounds", "seconds",
+                      "error", "prices", "matching"]
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            for rec in records:
+                row = dict(rec)
+                for key in ("prices", "matching"):
+                    if key in row:
+                        row[key] = json.dumps(row[key])
+                writer.writerow(row)
+        else:
+            for rec in records:
+                f.write(json.dumps(rec) + "\n")
+
+def run_batch(pattern, engine, out_path, workers=None):
+    """Clears every market matching pattern in a process pool and writes the results."""
+    files = batch_files(pattern)
+    if not files:
+        die(f"No .gml files match: {pattern}")
+    tasks = [(path, engine) for path in files]
+    start = time.perf_counter()
+    if workers == 1 or len(files) == 1:
+        records = [_batch_worker(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            records = list(pool.map(_batch_worker, tasks, chunksize=max(1, len(tasks) // 64)))
+    elapsed = time.perf_counter() - start
+    write_batch(records, out_path)
+
+    failed = [r for r in records if "error" in r]
+    print("=== Batch Market Clearing ===")
+    print(f"Markets: {len(records)} ({len(failed)} failed), engine: {engine}")
+    print(f"Wall time: {elapsed:.3f}s, summed market time: "
+          f"{sum(r['seconds'] for r in records):.3f}s")
+    for r in failed:
+        print(f"  {r['file']}: {r['error']}")
+    print(f"Results written to {out_path}")
+
 def main():
     parser = argparse.ArgumentParser(description="Market Clearance Algorithm Tool")
-    parser.add_argument("file", help="Path to input bipartite .gml file")
+    parser.add_argument("file", help="Path to input bipartite .gml file "
+                                     "(with --batch: a directory or glob pattern)")
     parser.add_argument("--plot", action="store_true", help="Plot the final preferred-seller graph")
-    parser.add_argument("--interactive", action="store_true", help="Print output of every round")
+    parser.add_argument("--interactive", action="store_true",
+                        help="Print a short summary of every round")
+    parser.add_argument("--trace", default=None,
+                        help="Write compact per-round records to this JSON lines file")
+    parser.add_argument("--trace_every", type=int, default=1,
+                        help="With --trace, record every k-th round (default: 1)")
+    parser.add_argument("--engine", choices=["rounds", "dense", "auction", "assignment"],
+                        default="rounds",
+                        help="Clearing algorithm: unit price increments per round (default), "
+                             "the same rounds on a dense NumPy valuation matrix, an "
+                             "epsilon-scaling auction for large valuations, or an exact "
+                             "shortest-augmenting-path assignment solver")
+    parser.add_argument("--batch", action="store_true",
+                        help="Clear every .gml market in a directory or glob in parallel")
+    parser.add_argument("--batch_output", default="market_results.jsonl",
+                        help="Batch results file; .csv for CSV, otherwise JSON lines "
+                             "(default: market_results.jsonl)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for --batch (default: CPU count)")
     args = parser.parse_args()
 
+    if args.workers is not None and args.workers < 1:
+        die("--workers must be at least 1.")
+    if args.trace_every < 1:
+        die("--trace_every must be at least 1.")
+    if args.trace and args.engine != "rounds":
+        die("--trace is only supported with --engine rounds.")
+    if args.batch:
+        if args.plot or args.interactive or args.trace:
+            die("--plot, --interactive and --trace cannot be combined with --batch.")
+        run_batch(args.file, args.engine, args.batch_output, args.workers)
+        return
+
     # Load Graph Configuration
     G, buyers, sellers = load_graph(args.file)
     
-    # Initialize prices for all sellers to 0
-    prices = {s: 0 for s in sellers}
-    
-    round_num = 1
+    valuations, bidders = index_valuations(G, buyers, sellers)
+    if not has_perfect_matching(valuations, buyers):
+        die("No market-clearing matching exists: some set of buyers is adjacent to fewer sellers.")
     
-    while True:
-        # Step 1: Obtain preference seller graph
-        pref_G = get_preferred_graph(G, buyers, sellers, prices)
-        
-        # Step 2: Compute maximum matching
-        matching = nx.bipartite.maximum_matching(pref_G, top_nodes=buyers)
-        matched_buyers = {k for k in matching.keys() if k in buyers}
-        
-        if args.interactive:
-            print(f"--- Round {round_num} ---")
-            print(f"Current Prices: {prices}")
-            print(f"Preferred Edges: {list(pref_G.edges())}")
-            print(f"Current Matching: {[(b, matching[b]) for b in matched_buyers]}")
-            
-        # Step 3: Check for perfect matching
-        if len(matched_buyers) == len(buyers):
-            if args.interactive:
-                print("-> Market Cleared! Perfect matching found.\n")
-            break
-            
-        # Step 4: Compute constricted sets and update valuation
-        constricted_b, constricted_s = find_constricted_set(pref_G, matching, buyers, sellers)
-        
-        if args.interactive:
-            print(f"Constricted Buyers Set: {constricted_b}")
-            print(f"Constricted Sellers Set: {constricted_s}")
-            print(f"Action: Increasing price of constricted sellers by 1.\n")
-            
-        for s in constricted_s:
-            prices[s] += 1
-            
-        round_num += 1
+    trace = RoundTrace(args.trace, args.trace_every) if args.trace else None
+    prices, matching, pref_G, _, summary = clear_market(
+        valuations, bidders, buyers, sellers, args.engine, args.interactive, trace)
+    if trace is not None:
+        trace.close()
 
     # Final Output Summary
     print("=== Final Market Clearing Configuration ===")
-    print(f"Total Rounds: {round_num}")
+    print(summary)
     print("Final Prices:", prices)
     print("Market-Clearing Matching:")
     for b in buyers:
         print(f"  Buyer {b} purchases from Seller {matching[b]}")
+    if trace is not None:
+        print(f"Trace: {trace.records} records over {trace.rounds} rounds written to {trace.path} "
+              f"(largest constricted set: {trace.max_constricted} buyers)")
 
     # Plot if specified
     if args.plot:
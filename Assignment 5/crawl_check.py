@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Regression check: an interrupted and resumed crawl gives the same graph as one full crawl.
+
+Serves a synthetic site from a local HTTP server, then for each engine runs
+page_rank.py once uninterrupted and once as a crawl capped at --first pages
+followed by a --resume with the full limit, and compares the GML files.
+"""
+import argparse
+import filecmp
+import functools
+import http.server
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PAGE_RANK = os.path.join(HERE, "page_rank.py")
+
+
+def write_site(root, n_pages, n_links, seed):
+    """Writes n_pages linked HTML pages plus a few non-HTML and broken links."""
+    rng = random.Random(seed)
+    for i in range(n_pages):
+        links = [f"/p{rng.randrange(n_pages)}.html" for _ in range(n_links)]
+        links += [f"/p{(i + 1) % n_pages}.html", "/missing.html", "/style.css",
+                  f"/p{rng.randrange(n_pages)}.html?x=1#top"]
+        body = "".join(f'<p><a href="{href}">link</a></p>' for href in links)
+        with open(os.path.join(root, f"p{i}.html"), "w") as f:
+            f.write(f"<html><head><title>{i}</title></head><body>{body}</body></html>")
+
+
+def serve(root):
+    """Starts a threaded HTTP server for root on a free port; returns (server, port)."""
+    handler = functools.partial(QuietHandler, directory=root)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def crawl(workdir, engine, max_nodes, port, out, *extra):
+    """Runs one page_rank.py crawl and returns its exit status."""
+    config = os.path.join(workdir, f"crawler_{max_nodes}.txt")
+    with open(config, "w") as f:
+        f.write(f"{max_nodes}\n127.0.0.1:{port}\nhttp://127.0.0.1:{port}/p0.html\n")
+    cmd = [sys.executable, PAGE_RANK, "--crawler", config, "--engine", engine,
+           "--delay", "0", "--crawler_graph", out, *extra]
+    result = subprocess.run(cmd, cwd=workdir, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stdout + result.stderr, file=sys.stderr)
+    return result.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that crawl + --resume matches a full crawl")
+    parser.add_argument("--pages", type=int, default=150, help="Pages in the synthetic site (default: 150)")
+    parser.add_argument("--links", type=int, default=5, help="Random links per page (default: 5)")
+    parser.add_argument("--first", type=int, default=30,
+                        help="max_nodes of the interrupted crawl (default: 30)")
+    parser.add_argument("--engines", default="scrapy,async",
+                        help="Comma-separated engines to check (default: scrapy,async)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the site")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        site = os.path.join(tmp, "site")
+        os.mkdir(site)
+        write_site(site, args.pages, args.links, args.seed)
+        server, port = serve(site)
+        limit = 10 * args.pages
+        try:
+            for engine in args.engines.split(","):
+                full = os.path.join(tmp, f"{engine}_full.gml")
+                resumed = os.path.join(tmp, f"{engine}_resumed.gml")
+                state = os.path.join(tmp, f"{engine}.sqlite")
+                ok = (crawl(tmp, engine, limit, port, full) == 0
+                      and crawl(tmp, engine, args.first, port, resumed,
+                                "--checkpoint", state) == 0
+                      and crawl(tmp, engine, limit, port, resumed,
+                                "--checkpoint", state, "--resume") == 0
+                      and filecmp.cmp(full, resumed, shallow=False))
+                print(f"{engine:<8} crawl + resume {'matches' if ok else 'DIFFERS FROM'} full crawl")
+                failed |= not ok
+        finally:
+            server.shutdown()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,10 +8,25 @@ Usage examples:
 """
 
 import argparse
+import asyncio
+import codecs
 import collections
+import functools
+import html
+import html.parser
+import io
+import mimetypes
 import os
+import posixpath
+import random
+import re
+import sqlite3
 import sys
+import time
 import urllib.parse
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 
 import networkx as nx
 import matplotlib
@@ -105,29 +120,316 @@ def _netloc_from_domain(domain):
     return parsed.netloc or domain.split('/')[0]
 
 
+@functools.lru_cache(maxsize=1 << 16)
 def _normalize_url(url):
     """
     Canonical form of a URL:
       - strip query string and fragment
       - remove trailing slash from the path
     This reduces duplicate nodes caused by minor URL variations.
+    Cached: the same links appear on many pages of a site.
     """
     p = urllib.parse.urlparse(url)
     clean_path = p.path.rstrip('/')
     return urllib.parse.urlunparse((p.scheme, p.netloc, clean_path, '', '', ''))
 
 
+# Crawl state: interned URLs and compact edge arrays
+
+class CrawlGraph:
+    """
+    Link graph collected during a crawl.
+
+    URLs are interned to integer ids as they are discovered.  Per-id flags
+    mark crawled and scheduled pages, and links are int32 (src, dst) pairs
+    in growable arrays.  Memory therefore holds each URL string once and
+    8 bytes per link.
+
+    *pending* maps scheduled but not yet crawled ids to the URL they were
+    requested with; it is the crawl frontier.  *dirty* collects ids whose
+    flags changed since the last checkpoint.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.urls = []
+        self.crawled = bytearray()
+        self.scheduled = bytearray()
+        self.n_crawled = 0
+        self.src = array('i')
+        self.dst = array('i')
+        self.pending = {}
+        self.dirty = set()
+
+    def intern(self, url):
+        """Return the id of *url*, assigning the next one if it is new."""
+        i = self.ids.get(url)
+        if i is None:
+            i = self.ids[url] = len(self.urls)
+            self.urls.append(url)
+            self.crawled.append(0)
+            self.scheduled.append(0)
+        return i
+
+    def mark_crawled(self, i):
+        """Flag page *i* as crawled; returns False if it already was."""
+        if self.crawled[i]:
+            return False
+        self.crawled[i] = 1
+        self.n_crawled += 1
+        self.pending.pop(i, None)
+        self.dirty.add(i)
+        return True
+
+    def schedule(self, i, fetch_url):
+        """Flag page *i* as scheduled and remember the URL it is fetched by."""
+        self.scheduled[i] = 1
+        self.pending[i] = fetch_url
+        self.dirty.add(i)
+
+    def settle(self, i):
+        """Take page *i* out of the frontier without marking it crawled."""
+        if self.pending.pop(i, None) is not None:
+            self.dirty.add(i)
+
+    def unschedule(self, i):
+        """Drop a failed fetch so the page can be rediscovered later."""
+        self.scheduled[i] = 0
+        self.pending.pop(i, None)
+        self.dirty.add(i)
+
+    def add_edge(self, src, dst):
+        self.src.append(src)
+        self.dst.append(dst)
+
+    def edges(self):
+        """
+        Final graph as arrays: (nodes, src, dst).
+
+        *nodes* are the crawled ids in URL order, so the result does not
+        depend on the order pages happened to be fetched in; src/dst index
+        into it.  Links to pages that were never crawled and duplicates are
+        dropped.
+        """
+        np = _import_numpy()
+        crawled = np.frombuffer(bytes(self.crawled), dtype=np.uint8).astype(bool)
+        nodes = np.array(sorted(np.flatnonzero(crawled).tolist(),
+                                key=self.urls.__getitem__), dtype=np.int64)
+        position = np.full(len(self.urls), -1, dtype=np.int64)
+        position[nodes] = np.arange(len(nodes))
+        src = position[np.frombuffer(self.src, dtype=np.int32)]
+        dst = position[np.frombuffer(self.dst, dtype=np.int32)]
+        keep = (src >= 0) & (dst >= 0)
+        pairs = np.unique(src[keep] * len(nodes) + dst[keep])
+        return nodes, pairs // max(len(nodes), 1), pairs % max(len(nodes), 1)
+
+    def to_digraph(self):
+        """The crawl as a DiGraph with URL node labels."""
+        nodes, src, dst = self.edges()
+        urls = [self.urls[i] for i in nodes.tolist()]
+        G = nx.DiGraph()
+        G.add_nodes_from(urls)
+        G.add_edges_from(zip(map(urls.__getitem__, src.tolist()),
+                             map(urls.__getitem__, dst.tolist())))
+        return G
+
+    def save_gml(self, path):
+        """
+        Write the crawl to GML straight from the arrays.
+
+        GML requires integer node ids, so nodes are numbered sequentially
+        in URL order and keep their URL in the 'url' attribute.
+        """
+        nodes, src, dst = self.edges()
+        H = nx.DiGraph()
+        H.add_nodes_from((k, {'url': self.urls[i]})
+                         for k, i in enumerate(nodes.tolist()))
+        H.add_edges_from(zip(src.tolist(), dst.tolist()))
+        try:
+            nx.write_gml(H, path)
+            print(f"Crawled graph saved to '{path}'.")
+        except OSError as exc:
+            die(f"Failed to save graph to '{path}': {exc}")
+
+
+class CrawlCheckpoint:
+    """
+    SQLite checkpoint of a CrawlGraph.
+
+    Every save() appends what changed since the previous one in a single
+    transaction: new URLs, updated crawled/scheduled flags (with the fetch
+    URL of pages still in the frontier) and the new links as one pair of
+    int32 blobs.  An interrupted crawl loses at most the pages fetched
+    since the last save, and those are simply requested again.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS urls (
+            id INTEGER PRIMARY KEY, url TEXT NOT NULL,
+            crawled INTEGER NOT NULL, scheduled INTEGER NOT NULL,
+            fetch_url TEXT);
+        CREATE TABLE IF NOT EXISTS links (
+            chunk INTEGER PRIMARY KEY, src BLOB NOT NULL, dst BLOB NOT NULL);
+    '''
+
+    def __init__(self, path, every=50):
+        self.path = path
+        self.every = every
+        self.db = None
+        self.n_urls = 0
+        self.n_links = 0
+        self.n_chunks = 0
+
+    def open(self, domain, resume=False):
+        """
+        Open the store and return the CrawlGraph to continue from.
+
+        Without *resume* any existing checkpoint is replaced and the graph
+        is empty.  With it, the saved graph and frontier are loaded; the
+        checkpoint must come from a crawl of the same *domain*.
+        """
+        if resume and not os.path.exists(self.path):
+            print(f"No checkpoint at '{self.path}'; starting a new crawl.")
+            resume = False
+        if not resume and os.path.exists(self.path):
+            os.remove(self.path)
+        try:
+            self.db = sqlite3.connect(self.path)
+            self.db.executescript(self.SCHEMA)
+            meta = dict(self.db.execute('SELECT key, value FROM meta'))
+        except sqlite3.Error as exc:
+            die(f"Cannot open checkpoint '{self.path}': {exc}")
+
+        if meta.get('domain', domain) != domain:
+            die(f"Checkpoint '{self.path}' is for domain '{meta['domain']}', "
+                f"not '{domain}'.")
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                            ('domain', domain))
+        return self._load() if resume else CrawlGraph()
+
+    def _load(self):
+        graph = CrawlGraph()
+        rows = self.db.execute(
+            'SELECT id, url, crawled, scheduled, fetch_url FROM urls '
+            'ORDER BY id')
+        for i, url, crawled, scheduled, fetch_url in rows:
+            if graph.intern(url) != i:
+                die(f"Checkpoint '{self.path}' is corrupt (URL ids).")
+            if crawled:
+                graph.mark_crawled(i)
+            if scheduled:
+                graph.scheduled[i] = 1
+                if not crawled and fetch_url:
+                    graph.pending[i] = fetch_url
+        for src, dst in self.db.execute(
+                'SELECT src, dst FROM links ORDER BY chunk'):
+            graph.src.frombytes(src)
+            graph.dst.frombytes(dst)
+            self.n_chunks += 1
+        graph.dirty.clear()
+        self.n_urls = len(graph.urls)
+        self.n_links = len(graph.src)
+        print(f"Resuming from '{self.path}': {graph.n_crawled} pages crawled, "
+              f"{len(graph.pending)} in the frontier, "
+              f"{self.n_links} links.")
+        return graph
+
+    def _row(self, graph, i):
+        return (graph.crawled[i], graph.scheduled[i], graph.pending.get(i), i)
+
+    def save(self, graph):
+        """Write the changes since the last save."""
+        n_urls, n_links = len(graph.urls), len(graph.src)
+        try:
+            with self.db:
+                self.db.executemany(
+                    'INSERT INTO urls (url, crawled, scheduled, fetch_url, id) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    ((graph.urls[i],) + self._row(graph, i)
+                     for i in range(self.n_urls, n_urls)))
+                self.db.executemany(
+                    'UPDATE urls SET crawled = ?, scheduled = ?, fetch_url = ? '
+                    'WHERE id = ?',
+                    (self._row(graph, i) for i in graph.dirty
+                     if i < self.n_urls))
+                if n_links > self.n_links:
+                    self.db.execute(
+                        'INSERT INTO links VALUES (?, ?, ?)',
+                        (self.n_chunks,
+                         graph.src[self.n_links:n_links].tobytes(),
+                         graph.dst[self.n_links:n_links].tobytes()))
+                    self.n_chunks += 1
+        except sqlite3.Error as exc:
+            die(f"Failed to write checkpoint '{self.path}': {exc}")
+        graph.dirty.clear()
+        self.n_urls, self.n_links = n_urls, n_links
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
 # Web crawling with Scrapy
 
-def crawl_with_scrapy(max_nodes, domain, start_urls):
+USER_AGENT = 'Mozilla/5.0 (compatible; PageRankCrawler/1.0)'
+DOWNLOAD_TIMEOUT = 20     # seconds per request
+RETRY_TIMES = 1
+REDIRECT_MAX = 3
+
+DENY_EXTENSIONS = [
+    'css', 'js', 'jpg', 'jpeg', 'png', 'gif', 'bmp',
+    'ico', 'svg', 'pdf', 'zip', 'tar', 'gz', 'xml',
+    'json', 'txt', 'csv', 'mp3', 'mp4', 'avi', 'mov',
+    'woff', 'woff2', 'ttf', 'eot',
+]
+
+
+def _link_extractor(LinkExtractor, allowed_domain):
+    """The link extractor shared by the live and the offline crawl."""
+    return LinkExtractor(allow_domains=[allowed_domain],
+                         deny_extensions=DENY_EXTENSIONS)
+
+
+def _print_parse_timings(timings):
+    """Summarise the per-stage parse times collected during a crawl."""
+    pages = int(timings.get('pages', 0))
+    if not pages:
+        return
+    stages = [(stage, timings[stage]) for stage in
+              ('extract', 'normalize', 'graph', 'checkpoint')
+              if stage in timings]
+    total = sum(t for _, t in stages)
+    print(f"Parse time: {total:.2f}s over {pages} pages "
+          f"({1000 * total / pages:.3f} ms/page)")
+    for stage, t in stages:
+        print(f"  {stage:<10} {t:8.3f}s  {1000 * t / pages:8.3f} ms/page")
+    cache = _normalize_url.cache_info()
+    lookups = cache.hits + cache.misses
+    if lookups:
+        print(f"  URL normalization cache: {cache.hits / lookups:.1%} hits "
+              f"({cache.currsize} URLs cached)")
+
+
+def crawl_with_scrapy(max_nodes, domain, start_urls, checkpoint=None,
+                      resume=False, concurrency=8, per_host=8, delay=0.2):
     """
     Perform a breadth-first web crawl using Scrapy.
 
     Only HTML pages within *domain* are visited.  Crawling stops once
-    *max_nodes* distinct pages have been collected.
+    *max_nodes* distinct pages have been collected.  At most *concurrency*
+    requests are in flight, *per_host* of them to one host, and requests
+    to a host are spaced by about *delay* seconds.
 
-    Returns a networkx.DiGraph where each node is a normalized URL and
-    a directed edge (u -> v) means page u contained a hyperlink to page v.
+    With a CrawlCheckpoint the crawl state is saved every checkpoint.every
+    pages and when the crawl stops.  *resume* continues from the saved
+    frontier instead of the seeds; crawled pages are not fetched again.
+
+    Returns a CrawlGraph; its to_digraph() has a node per normalized URL
+    and a directed edge (u -> v) wherever page u linked to page v.
     """
     try:
         import scrapy
@@ -142,162 +444,964 @@ def crawl_with_scrapy(max_nodes, domain, start_urls):
         die(f"Could not extract a hostname from domain value '{domain}'.")
 
     # Mutable shared state - populated by the spider during the crawl.
-    collected = {
-        'nodes': set(),
-        'edges': set(),
-        'scheduled': set(),
-        'failures': collections.Counter(),
-    }
-
-    # Inner spider class (closure over collected, allowed_domain, etc.)
+    if checkpoint is not None:
+        graph = checkpoint.open(allowed_domain, resume)
+    else:
+        graph = CrawlGraph()
+    failures = collections.Counter()
+    timings = collections.defaultdict(float)
+    # Built once: its domain and extension filters compile regexes.
+    link_extractor = _link_extractor(LinkExtractor, allowed_domain)
+
+    # Inner spider class (closure over graph, allowed_domain, etc.)
     class LinkSpider(scrapy.Spider):
         name = 'link_spider'
         # Scrapy's OffsiteMiddleware drops requests outside allowed_domains.
-        allowed_domains = [allowed_domain]
+        # It takes host names only and ignores an entry with a port.
+        allowed_domains = [urllib.parse.urlsplit('//' + allowed_domain).hostname]
 
         custom_settings = {
             'ROBOTSTXT_OBEY': False,
-            'CONCURRENT_REQUESTS': 8,
-            'DOWNLOAD_DELAY': 0.2,
+            'CONCURRENT_REQUESTS': concurrency,
+            'CONCURRENT_REQUESTS_PER_DOMAIN': per_host,
+            'DOWNLOAD_DELAY': delay,
             'RANDOMIZE_DOWNLOAD_DELAY': True,
             'LOG_LEVEL': 'ERROR',
             'COOKIES_ENABLED': False,
             'TELNETCONSOLE_ENABLED': False,
-            'DOWNLOAD_TIMEOUT': 20,
-            'RETRY_TIMES': 1,
-            'REDIRECT_MAX_TIMES': 3,
-            'USER_AGENT': (
-                'Mozilla/5.0 (compatible; PageRankCrawler/1.0)'
-            ),
+            'DOWNLOAD_TIMEOUT': DOWNLOAD_TIMEOUT,
+            'RETRY_TIMES': RETRY_TIMES,
+            'REDIRECT_MAX_TIMES': REDIRECT_MAX,
+            'USER_AGENT': USER_AGENT,
         }
 
+        async def start(self):
+            # Scrapy >= 2.13 calls start(); older versions start_requests().
+            for request in self.start_requests():
+                yield request
+
         def start_requests(self):
+            if graph.urls:
+                # Resumed: refetch only the frontier of the saved crawl.
+                for node, url in list(graph.pending.items()):
+                    yield scrapy.Request(
+                        url,
+                        callback=self.parse,
+                        errback=self.on_error,
+                        meta={'node_id': node},
+                    )
+                return
             for url in start_urls:
-                norm = _normalize_url(url)
-                collected['scheduled'].add(norm)
+                node = graph.intern(_normalize_url(url))
+                graph.schedule(node, url)
                 yield scrapy.Request(
                     url,
                     callback=self.parse,
                     errback=self.on_error,
                     dont_filter=True,
-                    meta={'norm_url': norm},
+                    meta={'node_id': node},
                 )
 
         def on_error(self, failure):
             request = failure.request
-            target = request.meta.get('norm_url', _normalize_url(request.url))
-            collected['failures'][target] += 1
+            node = request.meta.get('node_id')
+            if node is None:
+                node = graph.intern(_normalize_url(request.url))
+            failures[node] += 1
 
             # Allow the URL to be rediscovered later if this fetch failed.
-            if target not in collected['nodes']:
-                collected['scheduled'].discard(target)
+            if not graph.crawled[node]:
+                graph.unschedule(node)
 
-            fail_count = sum(collected['failures'].values())
+            fail_count = sum(failures.values())
             if fail_count <= 5 or fail_count % 10 == 0:
                 print(f"  ... {fail_count} request failures so far "
-                      f"(latest: {target})")
+                      f"(latest: {graph.urls[node]})")
 
         def parse(self, response):
+            # Returns a list rather than yielding, so a page and all of its
+            # links are recorded before a checkpoint can be taken.
+            # Responses that arrive after max_nodes was reached stay in the
+            # frontier, so a resumed crawl fetches them again.
+            if graph.n_crawled >= max_nodes:
+                raise CloseSpider('max_nodes_reached')
+            # The request is answered even if it redirected or is not HTML.
+            graph.settle(response.meta['node_id'])
+
             # Only process HTML pages.
             ctype = response.headers.get('Content-Type', b'')
             if isinstance(ctype, (bytes, bytearray)):
                 ctype = ctype.decode('utf-8', errors='ignore')
             if 'html' not in ctype.lower():
-                return
+                return []
 
             source = _normalize_url(response.url)
+            src = graph.intern(source)
 
             # Register this page as a crawled node.
-            if source not in collected['nodes']:
-                collected['nodes'].add(source)
-                n = len(collected['nodes'])
+            new_page = graph.mark_crawled(src)
+            if new_page:
+                n = graph.n_crawled
                 if n <= 10 or n % 10 == 0:
                     print(f"  ... {n} nodes crawled")
 
-            # Hard stop once we have enough nodes.
-            if len(collected['nodes']) >= max_nodes:
-                raise CloseSpider('max_nodes_reached')
-
             # Extract hyperlinks within the same domain.
-            le = LinkExtractor(
-                allow_domains=[allowed_domain],
-                deny_extensions=[
-                    'css', 'js', 'jpg', 'jpeg', 'png', 'gif', 'bmp',
-                    'ico', 'svg', 'pdf', 'zip', 'tar', 'gz', 'xml',
-                    'json', 'txt', 'csv', 'mp3', 'mp4', 'avi', 'mov',
-                    'woff', 'woff2', 'ttf', 'eot',
-                ],
-            )
-            for link in le.extract_links(response):
-                target = _normalize_url(link.url)
+            t0 = time.perf_counter()
+            links = link_extractor.extract_links(response)
+            t1 = time.perf_counter()
+            targets = [(_normalize_url(link.url), link.url) for link in links]
+            t2 = time.perf_counter()
+            requests = []
+            for target, link_url in targets:
                 if target == source:
                     continue
 
                 # Record the directed edge source -> target.
-                collected['edges'].add((source, target))
+                dst = graph.intern(target)
+                graph.add_edge(src, dst)
 
                 # Queue the target only once per normalized URL. Without this,
                 # densely linked sites like DBLP can flood the scheduler with
                 # duplicate requests and appear to stall between progress logs.
-                if (target not in collected['scheduled']
-                        and len(collected['nodes']) < max_nodes):
-                    collected['scheduled'].add(target)
-                    yield scrapy.Request(
-                        link.url,
-                        callback=self.parse,
-                        errback=self.on_error,
-                        meta={'norm_url': target},
-                    )
+                # Past max_nodes targets are only added to the frontier.
+                if not graph.scheduled[dst]:
+                    graph.schedule(dst, link_url)
+                    if graph.n_crawled < max_nodes:
+                        requests.append(scrapy.Request(
+                            link_url,
+                            callback=self.parse,
+                            errback=self.on_error,
+                            meta={'node_id': dst},
+                        ))
+            t3 = time.perf_counter()
+            timings['extract'] += t1 - t0
+            timings['normalize'] += t2 - t1
+            timings['graph'] += t3 - t2
+            timings['pages'] += 1
+
+            if (checkpoint is not None and new_page
+                    and graph.n_crawled % checkpoint.every == 0):
+                checkpoint.save(graph)
+                timings['checkpoint'] += time.perf_counter() - t3
+
+            # Hard stop once we have enough nodes.  This page's links are
+            # recorded first, so a resumed crawl does not lose them.
+            if graph.n_crawled >= max_nodes:
+                raise CloseSpider('max_nodes_reached')
+            return requests
 
-    # Run the spider (blocks until finished or max_nodes reached)
-    print(f"Starting Scrapy crawl  (domain={allowed_domain}, "
-          f"max_nodes={max_nodes}) ...")
-    process = CrawlerProcess(settings={
-        'LOG_ENABLED': False,
-    })
-    process.crawl(LinkSpider)
-    process.start()  # Twisted reactor runs here; blocks until spider stops.
-
-    # Assemble the directed graph from collected data
-    G = nx.DiGraph()
-    G.add_nodes_from(collected['nodes'])
-    for src, dst in collected['edges']:
-        # Only add edges whose endpoints are both in the crawled node set.
-        if src in collected['nodes'] and dst in collected['nodes']:
-            G.add_edge(src, dst)
-
-    print(f"Crawl finished: {G.number_of_nodes()} nodes, "
-          f"{G.number_of_edges()} edges.")
-    return G
+    if graph.urls and (graph.n_crawled >= max_nodes or not graph.pending):
+        print("Checkpointed crawl is already complete; nothing to fetch.")
+    else:
+        # Run the spider (blocks until finished or max_nodes reached)
+        print(f"Starting Scrapy crawl  (domain={allowed_domain}, "
+              f"max_nodes={max_nodes}) ...")
+        process = CrawlerProcess(settings={
+            'LOG_ENABLED': False,
+        })
+        process.crawl(LinkSpider)
+        process.start()  # Twisted reactor runs here; blocks until it stops.
+
+    if checkpoint is not None:
+        # Also reached after Ctrl-C: Scrapy shuts down gracefully first.
+        checkpoint.save(graph)
+        checkpoint.close()
+        print(f"Crawl state checkpointed to '{checkpoint.path}'.")
+
+    # Only edges whose endpoints were both crawled are kept.
+    _, src, _ = graph.edges()
+    print(f"Crawl finished: {graph.n_crawled} nodes, {len(src)} edges "
+          f"({len(graph.urls)} URLs discovered).")
+    _print_parse_timings(timings)
+    return graph
+
+
+# Web crawling with asyncio
+
+RETRY_HTTP_CODES = {500, 502, 503, 504, 522, 524, 408, 429}   # as Scrapy's
+_HTML_WHITESPACE = ' \t\n\r\x0c'
+_PATH_SAFE = "!$&'()*+,;=:@/%"
+
+
+def _safe_url(url):
+    """Percent-encode the unsafe characters of a URL, as Scrapy does."""
+    p = urllib.parse.urlsplit(url)
+    return urllib.parse.urlunsplit((
+        p.scheme, p.netloc,
+        urllib.parse.quote(p.path, safe=_PATH_SAFE),
+        urllib.parse.quote(p.query, safe=_PATH_SAFE + '?'),
+        urllib.parse.quote(p.fragment, safe=_PATH_SAFE + '?#'),
+    ))
+
+
+def _in_domain(url, domain):
+    """True if the host of *url* is *domain* or one of its subdomains."""
+    host = urllib.parse.urlparse(url).netloc.lower()
+    return host == domain or host.endswith('.' + domain)
+
+
+class _LinkParser(html.parser.HTMLParser):
+    """
+    Incremental <a>/<area> href extractor fed while a page downloads.
 
+    Applies the filters of the spider's LinkExtractor: <base href>,
+    http(s)/file/ftp schemes only, the allowed domain and its subdomains,
+    no DENY_EXTENSIONS, and each URL once.
+    """
 
-# Save crawled graph (URL-labelled nodes -> integer IDs for GML)
+    def __init__(self, url, allowed_domain):
+        super().__init__(convert_charrefs=True)
+        self.base = url
+        self.has_base = False
+        self.domain = allowed_domain.lower()
+        self.deny = {'.' + ext for ext in DENY_EXTENSIONS}
+        self.seen = set()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'base' and not self.has_base:
+            href = dict(attrs).get('href')
+            if href:
+                self.base = urllib.parse.urljoin(
+                    self.base, href.strip(_HTML_WHITESPACE))
+                self.has_base = True
+        elif tag in ('a', 'area'):
+            for name, value in attrs:
+                if name == 'href' and value is not None:
+                    self._add(value)
+
+    def _add(self, href):
+        try:
+            url = _safe_url(urllib.parse.urljoin(
+                self.base, href.strip(_HTML_WHITESPACE)))
+            p = urllib.parse.urlparse(url)
+        except ValueError:
+            return
+        if url.split('://', 1)[0] not in ('http', 'https', 'file', 'ftp'):
+            return
+        if not _in_domain(url, self.domain):
+            return
+        if posixpath.splitext(p.path)[1].lower() in self.deny:
+            return
+        if url not in self.seen:
+            self.seen.add(url)
+            self.links.append(url)
+
+
+async def _crawl_async(graph, max_nodes, allowed_domain, requests,
+                       concurrency, per_host, delay, checkpoint,
+                       timings, failures):
+    import aiohttp
+
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+    requested = set()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    slots = collections.defaultdict(lambda: asyncio.Semaphore(per_host))
+    next_start = collections.defaultdict(float)
+
+    async def fetch(session, url):
+        """
+        Download *url* and parse it as it streams in.
+
+        Returns (final_url, links) for an HTML page, (final_url, None) for
+        other content and None when the request failed.
+        """
+        host = urllib.parse.urlparse(url).netloc
+        async with slots[host]:
+            for attempt in range(RETRY_TIMES + 1):
+                # Politeness: space requests to a host by 0.5-1.5 x delay.
+                now = loop.time()
+                wait = next_start[host] - now
+                next_start[host] = max(now, next_start[host]) + \
+                    delay * random.uniform(0.5, 1.5)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                try:
+                    async with session.get(url, max_redirects=REDIRECT_MAX) \
+                            as response:
+                        if response.status in RETRY_HTTP_CODES:
+                            continue
+                        if not 200 <= response.status < 300:
+                            return None
+                        final_url = str(response.url)
+                        if not _in_domain(final_url, allowed_domain.lower()) \
+                                and final_url != url:
+                            return None     # redirected off the site
+                        ctype = response.headers.get('Content-Type', '')
+                        if 'html' not in ctype.lower():
+                            return final_url, None
+                        parser = _LinkParser(final_url, allowed_domain)
+                        decoder = codecs.getincrementaldecoder(
+                            response.charset or 'utf-8')(errors='replace')
+                        parse_time = 0.0
+                        async for chunk in response.content.iter_chunked(1 << 16):
+                            t0 = time.perf_counter()
+                            parser.feed(decoder.decode(chunk))
+                            parse_time += time.perf_counter() - t0
+                        t0 = time.perf_counter()
+                        parser.feed(decoder.decode(b'', final=True))
+                        parser.close()
+                        timings['extract'] += parse_time + time.perf_counter() - t0
+                        return final_url, parser.links
+                except (aiohttp.ClientError, asyncio.TimeoutError, LookupError):
+                    continue
+        return None
+
+    def record(node, page):
+        """Apply one fetched page to the graph; mirrors LinkSpider.parse."""
+        if stop.is_set():
+            return      # max_nodes reached while this page was in flight
+        graph.settle(node)
+        if page is None:
+            failures[node] += 1
+            if not graph.crawled[node]:
+                graph.unschedule(node)
+            fail_count = sum(failures.values())
+            if fail_count <= 5 or fail_count % 10 == 0:
+                print(f"  ... {fail_count} request failures so far "
+                      f"(latest: {graph.urls[node]})")
+            return
+        final_url, links = page
+        if links is None:
+            return
+
+        source = _normalize_url(final_url)
+        src = graph.intern(source)
+        new_page = graph.mark_crawled(src)
+        if new_page:
+            n = graph.n_crawled
+            if n <= 10 or n % 10 == 0:
+                print(f"  ... {n} nodes crawled")
+
+        t1 = time.perf_counter()
+        targets = [(_normalize_url(url), url) for url in links]
+        t2 = time.perf_counter()
+        for target, link_url in targets:
+            if target == source:
+                continue
+            dst = graph.intern(target)
+            graph.add_edge(src, dst)
+            if not graph.scheduled[dst]:
+                graph.schedule(dst, link_url)
+                # Like Scrapy's duplicate filter: a URL is requested once.
+                if urllib.parse.urldefrag(link_url)[0] in requested:
+                    graph.settle(dst)
+                elif graph.n_crawled < max_nodes:
+                    queue.put_nowait((dst, link_url))
+        t3 = time.perf_counter()
+        timings['normalize'] += t2 - t1
+        timings['graph'] += t3 - t2
+        timings['pages'] += 1
+
+        if (checkpoint is not None and new_page
+                and graph.n_crawled % checkpoint.every == 0):
+            checkpoint.save(graph)
+            timings['checkpoint'] += time.perf_counter() - t3
+        if graph.n_crawled >= max_nodes:
+            stop.set()
+
+    async def worker(session):
+        while True:
+            node, url = await queue.get()
+            try:
+                requested.add(urllib.parse.urldefrag(url)[0])
+                record(node, await fetch(session, url))
+            finally:
+                queue.task_done()
+
+    # One keep-alive connection pool shared by all workers.
+    connector = aiohttp.TCPConnector(limit=concurrency,
+                                     limit_per_host=per_host)
+    async with aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT),
+            headers={'User-Agent': USER_AGENT},
+            cookie_jar=aiohttp.DummyCookieJar()) as session:
+        workers = [asyncio.create_task(worker(session))
+                   for _ in range(concurrency)]
+        done = [asyncio.create_task(queue.join()),
+                asyncio.create_task(stop.wait())]
+        try:
+            await asyncio.wait(done, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in workers + done:
+                task.cancel()
+            await asyncio.gather(*workers, *done, return_exceptions=True)
+
+
+def crawl_async(max_nodes, domain, start_urls, checkpoint=None, resume=False,
+                concurrency=8, per_host=8, delay=0.2):
+    """
+    Breadth-first crawl with asyncio and aiohttp instead of Scrapy.
 
-def save_crawled_graph(G, path):
+    Same arguments, rules and CrawlGraph result as crawl_with_scrapy.
+    Workers share one keep-alive connection pool; pages are parsed while
+    they download.  Each call runs its own event loop, so it can be
+    called any number of times in one process.
     """
-    Write a crawled graph (URL node labels) to a GML file.
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        die("aiohttp is not installed.  Run:  pip install aiohttp")
 
-    GML requires node IDs to be integers, so we assign a sequential integer
-    to each node and store the original URL as the 'url' attribute.
+    allowed_domain = _netloc_from_domain(domain)
+    if not allowed_domain:
+        die(f"Could not extract a hostname from domain value '{domain}'.")
+
+    if checkpoint is not None:
+        graph = checkpoint.open(allowed_domain, resume)
+    else:
+        graph = CrawlGraph()
+    if graph.urls:
+        # Resumed: refetch only the frontier of the saved crawl.
+        requests = list(graph.pending.items())
+    else:
+        requests = []
+        for url in start_urls:
+            node = graph.intern(_normalize_url(url))
+            graph.schedule(node, url)
+            requests.append((node, url))
+    failures = collections.Counter()
+    timings = collections.defaultdict(float)
+
+    if graph.urls and (graph.n_crawled >= max_nodes or not graph.pending):
+        print("Checkpointed crawl is already complete; nothing to fetch.")
+    else:
+        print(f"Starting async crawl  (domain={allowed_domain}, "
+              f"max_nodes={max_nodes}, concurrency={concurrency}) ...")
+        try:
+            asyncio.run(_crawl_async(graph, max_nodes, allowed_domain,
+                                     requests, concurrency, per_host, delay,
+                                     checkpoint, timings, failures))
+        except KeyboardInterrupt:
+            print("Crawl interrupted.")
+
+    if checkpoint is not None:
+        checkpoint.save(graph)
+        checkpoint.close()
+        print(f"Crawl state checkpointed to '{checkpoint.path}'.")
+
+    _, src, _ = graph.edges()
+    print(f"Crawl finished: {graph.n_crawled} nodes, {len(src)} edges "
+          f"({len(graph.urls)} URLs discovered).")
+    _print_parse_timings(timings)
+    return graph
+
+
+# Offline crawl from saved pages
+
+OFFLINE_BATCH = 1024      # frontier pages handed to the worker pool at once
+
+_OFFLINE = None           # (corpus, link extractor) of a worker process
+
+
+def _read_warc_record(f):
+    """Read one WARC record from *f*; returns (headers, block) or None."""
+    line = f.readline()
+    while line in (b'\r\n', b'\n'):
+        line = f.readline()
+    if not line:
+        return None
+    if not line.startswith(b'WARC/'):
+        raise ValueError(f"no WARC record at byte {f.tell() - len(line)}")
+    headers = {}
+    for line in iter(f.readline, b''):
+        if line in (b'\r\n', b'\n'):
+            break
+        key, _, value = line.decode('utf-8', errors='replace').partition(':')
+        headers[key.strip().lower()] = value.strip()
+    block = f.read(int(headers.get('content-length', 0)))
+    return headers, block
+
+
+def _read_gzip_member(f):
+    """Decompress one gzip member and leave *f* just after it."""
+    d = zlib.decompressobj(31)
+    parts = []
+    while not d.eof:
+        chunk = f.read(1 << 16)
+        if not chunk:
+            raise ValueError("truncated gzip member")
+        parts.append(d.decompress(chunk))
+    f.seek(-len(d.unused_data), os.SEEK_CUR)
+    return b''.join(parts)
+
+
+def _dechunk(body):
+    """Undo HTTP chunked transfer encoding."""
+    out, pos = [], 0
+    while True:
+        end = body.find(b'\r\n', pos)
+        if end < 0:
+            break
+        try:
+            size = int(body[pos:end].split(b';')[0], 16)
+        except ValueError:
+            break
+        if size == 0:
+            break
+        out.append(body[end + 2:end + 2 + size])
+        pos = end + 4 + size
+    return b''.join(out)
+
+
+def _http_response(block):
+    """Split a stored HTTP response into (status, headers, body)."""
+    head, _, body = block.partition(b'\r\n\r\n')
+    lines = head.decode('iso-8859-1').split('\r\n')
+    try:
+        status = int(lines[0].split()[1])
+    except (IndexError, ValueError):
+        return 404, {}, b''
+    headers = {}
+    for line in lines[1:]:
+        key, _, value = line.partition(':')
+        headers[key.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        body = _dechunk(body)
+    if headers.get('content-encoding', '').lower() in ('gzip', 'x-gzip',
+                                                       'deflate'):
+        try:
+            body = zlib.decompress(body, 47)   # gzip or zlib header
+        except zlib.error:
+            pass
+    return status, headers, body
+
+
+class OfflineCorpus:
+    """
+    Saved pages keyed by URL, answered the way the web server would.
+
+    *path* is either a WARC file (.warc or per-record gzipped .warc.gz;
+    response and resource records are used) or a directory mirror laid
+    out as <host>/<path>, as written by `wget --mirror`.  In a mirror a
+    directory URL serves its index.html, and a directory URL without the
+    trailing slash redirects to it.
+    """
+
+    def __init__(self, path, index=None):
+        self.path = path
+        self.index = index
+        if os.path.isdir(path):
+            self.index = None
+        elif not os.path.isfile(path):
+            die(f"Offline corpus not found: '{path}'")
+        elif index is None:
+            self.index = self._index_warc()
+
+    def _index_warc(self):
+        """Map every target URI to the offset of its latest record."""
+        index = {}
+        gzipped = self.path.endswith('.gz')
+        try:
+            with open(self.path, 'rb') as f:
+                while True:
+                    offset = f.tell()
+                    if gzipped:
+                        if not f.read(1):
+                            break
+                        f.seek(offset)
+                        record = _read_warc_record(
+                            io.BytesIO(_read_gzip_member(f)))
+                    else:
+                        record = _read_warc_record(f)
+                    if record is None:
+                        break
+                    headers = record[0]
+                    if headers.get('warc-type') in ('response', 'resource'):
+                        uri = headers.get('warc-target-uri', '').strip('<>')
+                        index[urllib.parse.urldefrag(uri)[0]] = offset
+        except (OSError, ValueError, zlib.error) as exc:
+            die(f"Failed to read WARC file '{self.path}': {exc}")
+        print(f"Indexed {len(index)} URLs in '{self.path}'.")
+        return index
+
+    def _get(self, url):
+        if self.index is not None:
+            offset = self.index.get(url)
+            if offset is None:
+                return 404, {}, b''
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                if self.path.endswith('.gz'):
+                    f = io.BytesIO(_read_gzip_member(f))
+                headers, block = _read_warc_record(f)
+            if headers.get('warc-type') == 'resource':
+                return 200, {'content-type': headers.get('content-type', '')}, block
+            return _http_response(block)
+
+        p = urllib.parse.urlparse(url)
+        rel = posixpath.normpath('/' + urllib.parse.unquote(p.path)).lstrip('/')
+        path = os.path.join(self.path, p.netloc, rel)
+        if os.path.isdir(path):
+            if not p.path.endswith('/'):
+                return 301, {'location': p.path + '/'}, b''
+            path = os.path.join(path, 'index.html')
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            return 404, {}, b''
+        ctype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        return 200, {'content-type': ctype}, body
+
+    def fetch(self, url):
+        """Return (final_url, content_type, body), or None if not found."""
+        url = urllib.parse.urldefrag(url)[0]
+        for _ in range(REDIRECT_MAX + 1):
+            status, headers, body = self._get(url)
+            if status == 200:
+                return url, headers.get('content-type', ''), body
+            if not 300 <= status < 400 or 'location' not in headers:
+                return None
+            url = urllib.parse.urldefrag(
+                urllib.parse.urljoin(url, headers['location']))[0]
+        return None
+
+
+def _offline_init(path, allowed_domain, index):
+    global _OFFLINE
+    from scrapy.linkextractors import LinkExtractor
+    _OFFLINE = (OfflineCorpus(path, index),
+                _link_extractor(LinkExtractor, allowed_domain))
+
+
+def _offline_fetch(url):
+    """
+    Fetch one saved page and extract its links (runs in the worker pool).
+
+    Returns None for a missing page, (source, None) for a non-HTML page
+    and (source, [(target, link_url), ...]) otherwise, where source and
+    targets are normalized URLs.
+    """
+    from scrapy.http import HtmlResponse
+    corpus, le = _OFFLINE
+    page = corpus.fetch(url)
+    if page is None:
+        return None
+    final_url, ctype, body = page
+    source = _normalize_url(final_url)
+    if 'html' not in ctype.lower():
+        return source, None
+    response = HtmlResponse(final_url, body=body,
+                            headers={'Content-Type': ctype})
+    return source, [(_normalize_url(link.url), link.url)
+                    for link in le.extract_links(response)]
+
+
+def crawl_offline(max_nodes, domain, start_urls, corpus_path, workers=None):
+    """
+    Build the crawl graph from saved pages instead of the live site.
+
+    Pages are visited breadth-first from the seeds with the same URL
+    normalization, domain filter, link extractor and stopping rule as
+    crawl_with_scrapy.  Fetching and link extraction run in a process
+    pool, one batch of the frontier at a time; results are applied in
+    frontier order, so the same corpus always gives the same graph.
+    Once the whole reachable site fits in *max_nodes*, the graph is the
+    one the live crawl of that site produces.
     """
-    url_to_id = {url: idx for idx, url in enumerate(G.nodes())}
-    H = nx.DiGraph()
-    for url, idx in url_to_id.items():
-        H.add_node(idx, url=url)
-    for src, dst in G.edges():
-        H.add_edge(url_to_id[src], url_to_id[dst])
     try:
-        nx.write_gml(H, path)
-        print(f"Crawled graph saved to '{path}'.")
-    except OSError as exc:
-        die(f"Failed to save graph to '{path}': {exc}")
+        import scrapy  # noqa: F401  (used by the workers)
+    except ImportError:
+        die("Scrapy is not installed.  Run:  pip install scrapy")
+
+    allowed_domain = _netloc_from_domain(domain)
+    if not allowed_domain:
+        die(f"Could not extract a hostname from domain value '{domain}'.")
+    corpus = OfflineCorpus(corpus_path)
+
+    graph = CrawlGraph()
+    frontier = collections.deque()
+    for url in start_urls:
+        node = graph.intern(_normalize_url(url))
+        graph.schedule(node, url)
+        frontier.append((node, url))
+    # Request URLs already fetched; Scrapy's duplicate filter drops these.
+    requested = set()
+    missing = 0
+
+    print(f"Starting offline crawl  (corpus={corpus_path}, "
+          f"domain={allowed_domain}, max_nodes={max_nodes}) ...")
+    start = time.perf_counter()
+    initargs = (corpus_path, allowed_domain, corpus.index)
+    pool = None
+    if workers == 1:
+        _offline_init(*initargs)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers,
+                                   initializer=_offline_init,
+                                   initargs=initargs)
+    n_workers = workers or os.cpu_count() or 1
+    try:
+        while frontier and graph.n_crawled < max_nodes:
+            batch = [frontier.popleft()
+                     for _ in range(min(len(frontier), OFFLINE_BATCH))]
+            urls = [url for _, url in batch]
+            if pool is None:
+                results = map(_offline_fetch, urls)
+            else:
+                results = pool.map(_offline_fetch, urls,
+                                   chunksize=max(1, len(urls) // (4 * n_workers)))
+            for (node, url), result in zip(batch, results):
+                requested.add(urllib.parse.urldefrag(url)[0])
+                graph.settle(node)
+                if result is None:
+                    missing += 1
+                    if not graph.crawled[node]:
+                        graph.unschedule(node)
+                    continue
+                source, links = result
+                if links is None:
+                    continue
+                src = graph.intern(source)
+                if graph.mark_crawled(src):
+                    n = graph.n_crawled
+                    if n <= 10 or n % 1000 == 0:
+                        print(f"  ... {n} nodes crawled")
+                for target, link_url in links:
+                    if target == source:
+                        continue
+                    dst = graph.intern(target)
+                    graph.add_edge(src, dst)
+                    if not graph.scheduled[dst]:
+                        graph.schedule(dst, link_url)
+                        if urllib.parse.urldefrag(link_url)[0] in requested:
+                            graph.settle(dst)
+                        else:
+                            frontier.append((dst, link_url))
+                if graph.n_crawled >= max_nodes:
+                    break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    elapsed = time.perf_counter() - start
+
+    _, src, _ = graph.edges()
+    print(f"Crawl finished: {graph.n_crawled} nodes, {len(src)} edges "
+          f"({len(graph.urls)} URLs discovered).")
+    print(f"Offline crawl took {elapsed:.2f}s "
+          f"({graph.n_crawled / max(elapsed, 1e-9):.0f} pages/s, "
+          f"{missing} missing pages).")
+    return graph
 
 
 # PageRank
 
-def compute_pagerank(G, alpha=0.85):
+def _import_numpy():
+    """Import NumPy, or exit with an install hint."""
+    try:
+        import numpy as np
+    except ImportError:
+        die("NumPy is not installed.  Run:  pip install numpy")
+    return np
+
+
+def _import_scipy():
+    """Import NumPy and scipy.sparse, or exit with an install hint."""
+    try:
+        import numpy as np
+        import scipy.sparse as sp
+    except ImportError:
+        die("SciPy is not installed.  Run:  pip install scipy")
+    return np, sp
+
+
+def transition_matrix(G, nodes=None, dtype='float64'):
+    """
+    Build the transposed, row-normalised link matrix of *G*.
+
+    Returns (nodes, Pt, dangling) where Pt is an N x N CSR matrix with
+    Pt[v, u] = w(u, v) / out_weight(u), so one PageRank step is a single
+    sparse mat-vec Pt @ x.  *dangling* is a boolean mask of the nodes
+    without out-links, whose rank is redistributed uniformly.
+    """
+    np, sp = _import_scipy()
+    if nodes is None:
+        nodes = list(G)
+    A = nx.to_scipy_sparse_array(G, nodelist=nodes, weight='weight',
+                                 dtype=dtype, format='csr')
+    out = np.asarray(A.sum(axis=1)).ravel()
+    dangling = out == 0
+    inv = np.zeros_like(out)
+    inv[~dangling] = 1.0 / out[~dangling]
+    Pt = (sp.diags_array(inv) @ A).T.tocsr().astype(dtype, copy=False)
+    return nodes, Pt, dangling
+
+
+def power_iteration(Pt, dangling, x, alpha=0.85, tol=1.0e-6, max_iter=200,
+                    residuals=None):
+    """
+    Run PageRank power iterations on *Pt* starting from the vector *x*.
+
+    Convergence follows NetworkX: stop once the L1 change of an iteration
+    is below N * tol.  Each iteration's L1 residual is appended to
+    *residuals* when a list is given.
+
+    Returns (x, iterations, residual, converged).
+    """
+    N = Pt.shape[0]
+    teleport = (1.0 - alpha) / N
+    residual = float('inf')
+    for it in range(1, max_iter + 1):
+        x_last = x
+        x = alpha * (Pt @ x_last)
+        x += alpha * x_last[dangling].sum() / N + teleport
+        residual = float(abs(x - x_last).sum())
+        if residuals is not None:
+            residuals.append(residual)
+        if residual < N * tol:
+            return x, it, residual, True
+    return x, max_iter, residual, False
+
+
+def gauss_seidel(Pt, dangling, x, alpha=0.85, tol=1.0e-6, max_iter=200,
+                 residuals=None):
+    """
+    PageRank by Gauss-Seidel sweeps on (I - alpha * Pt) y = 1.
+
+    Normalising y gives PageRank with uniform dangling mass (see
+    push_update), so *dangling* needs no special handling here.  Each sweep
+    is one triangular solve with the lower part of the matrix, so values
+    updated earlier in the sweep are used at once.  The stopping rule is the
+    one of power_iteration, applied to the normalised vector.
+    """
+    np, sp = _import_scipy()
+    from scipy.sparse.linalg import spsolve_triangular
+
+    N = Pt.shape[0]
+    A = (sp.eye_array(N, format='csr', dtype=Pt.dtype) - alpha * Pt).tocsr()
+    lower = sp.tril(A, format='csr')
+    upper = sp.triu(A, k=1, format='csr')
+    y = x * N
+    residual = float('inf')
+    for it in range(1, max_iter + 1):
+        y = spsolve_triangular(lower, 1.0 - upper @ y, lower=True)
+        x_next = y / y.sum()
+        residual = float(abs(x_next - x).sum())
+        x = x_next
+        if residuals is not None:
+            residuals.append(residual)
+        if residual < N * tol:
+            return x, it, residual, True
+    return x, max_iter, residual, False
+
+
+def _quadratic_extrapolation(x0, x1, x2, x3):
+    """Quadratic extrapolation (Kamvar et al.) from four successive iterates."""
+    np, _ = _import_scipy()
+    Y = np.column_stack([x1 - x0, x2 - x0])
+    (g1, g2), *_ = np.linalg.lstsq(Y, -(x3 - x0), rcond=None)
+    z = (g1 + g2 + 1.0) * x1 + (g2 + 1.0) * x2 + x3
+    total = z.sum()
+    if not np.isfinite(total) or total <= 0:
+        return x3
+    return np.maximum(z / total, 0.0).astype(x3.dtype, copy=False)
+
+
+def extrapolated_power(Pt, dangling, x, alpha=0.85, tol=1.0e-6, max_iter=200,
+                       residuals=None, every=10):
     """
-    Compute PageRank using NetworkX's power-iteration implementation.
+    Power iteration with quadratic extrapolation every *every* iterations.
+
+    The last four iterates estimate the error along the second and third
+    eigenvectors, and the extrapolated vector removes it.  This helps most
+    when alpha is close to one.
+    """
+    N = Pt.shape[0]
+    teleport = (1.0 - alpha) / N
+    history = collections.deque([x], maxlen=4)
+    residual = float('inf')
+    for it in range(1, max_iter + 1):
+        x_last = x
+        x = alpha * (Pt @ x_last)
+        x += alpha * x_last[dangling].sum() / N + teleport
+        residual = float(abs(x - x_last).sum())
+        if residuals is not None:
+            residuals.append(residual)
+        if residual < N * tol:
+            return x, it, residual, True
+        history.append(x)
+        if it % every == 0 and len(history) == 4:
+            x = _quadratic_extrapolation(*history)
+            history.clear()
+            history.append(x)
+    return x, max_iter, residual, False
+
+
+def adaptive_power(Pt, dangling, x, alpha=0.85, tol=1.0e-6, max_iter=200,
+                   residuals=None, refresh=4):
+    """
+    Adaptive PageRank (Kamvar et al.): stop updating converged nodes.
+
+    Every *refresh* iterations a full iteration updates all nodes.  Nodes
+    whose value then changes by less than 0.1 * N * tol times their own
+    rank are frozen until the next full iteration.  Together they account
+    for at most a tenth of the stopping threshold.  In between, only the
+    rows of the active nodes are multiplied.  Convergence is only
+    accepted on a full iteration, so a node frozen too early is caught
+    there.
+    """
+    np, _ = _import_scipy()
+    N = Pt.shape[0]
+    teleport = (1.0 - alpha) / N
+    active = None           # None: a full iteration
+    residual = float('inf')
+    for it in range(1, max_iter + 1):
+        shift = alpha * x[dangling].sum() / N + teleport
+        if active is None:
+            update = alpha * (Pt @ x) + shift
+            change = abs(update - x)
+            residual = float(change.sum())
+            x = update
+            if residuals is not None:
+                residuals.append(residual)
+            if residual < N * tol:
+                return x, it, residual, True
+            active = np.flatnonzero(change >= 0.1 * N * tol * update)
+            rows = Pt[active]
+        else:
+            update = alpha * (rows @ x) + shift
+            residual = float(abs(update - x[active]).sum())
+            x = x.copy()
+            x[active] = update
+            if residuals is not None:
+                residuals.append(residual)
+            if it % refresh == 0:
+                active = None
+    return x, max_iter, residual, False
+
+
+SOLVERS = {
+    'power': power_iteration,
+    'gauss-seidel': gauss_seidel,
+    'extrapolation': extrapolated_power,
+    'adaptive': adaptive_power,
+}
+
+
+def compute_pagerank(G, alpha=0.85, tol=1.0e-6, max_iter=200, extra_iter=800,
+                     dtype='float64', residual_log=None, start=None,
+                     solver='power'):
+    """
+    Compute PageRank with a sparse iterative solver.
+
+    *solver* names an entry of SOLVERS: plain power iteration (default),
+    Gauss-Seidel sweeps, power iteration with quadratic extrapolation, or
+    adaptive power iteration.  All of them use the same stopping rule.
+
+    *start* optionally maps nodes to the ranks of a previous run (see
+    warm_start_vector); iteration then begins from those ranks instead of
+    the uniform vector.
+
+    If *max_iter* iterations do not converge, iteration continues from the
+    current vector for up to *extra_iter* more at the same tolerance.  The
+    result is returned either way; a warning reports the residual reached.
+    *dtype* may be 'float32' to halve the memory of the matrix and vector.
+    Per-iteration residuals are written to *residual_log* if given.
 
     Returns a dict {node: rank_value}.
     """
@@ -308,15 +1412,687 @@ def compute_pagerank(G, alpha=0.85):
         G = G.to_directed()
 
     print(f"Computing PageRank  (alpha={alpha}, "
-          f"nodes={G.number_of_nodes()}, edges={G.number_of_edges()}) ...")
+          f"nodes={G.number_of_nodes()}, edges={G.number_of_edges()}, "
+          f"dtype={dtype}, solver={solver}) ...")
+
+    np, _ = _import_scipy()
+    solve = SOLVERS[solver]
+    nodes, Pt, dangling = transition_matrix(G, dtype=dtype)
+    N = len(nodes)
+    if start is None:
+        x = np.full(N, 1.0 / N, dtype=dtype)
+    else:
+        x = warm_start_vector(G, nodes, start, alpha).astype(dtype)
+    residuals = []
+
+    started = time.perf_counter()
+    x, iters, residual, converged = solve(
+        Pt, dangling, x, alpha, tol, max_iter, residuals)
+    if not converged and extra_iter > 0:
+        print(f"Warning: PageRank not converged after {iters} iterations "
+              f"(L1 residual {residual:.3e}); continuing from current vector.")
+        x, more, residual, converged = solve(
+            Pt, dangling, x, alpha, tol, extra_iter, residuals)
+        iters += more
+    elapsed = time.perf_counter() - started
+
+    if converged:
+        print(f"PageRank converged in {iters} iterations, {elapsed:.3f}s "
+              f"(L1 residual {residual:.3e}).")
+    else:
+        print(f"Warning: PageRank did not converge in {iters} iterations "
+              f"({elapsed:.3f}s); L1 residual {residual:.3e} "
+              f"(target {N * tol:.3e}). Using the current vector.")
+
+    if residual_log:
+        try:
+            with open(residual_log, 'w', encoding='utf-8') as fh:
+                fh.write("# iteration\tl1_residual\n")
+                for i, r in enumerate(residuals, 1):
+                    fh.write(f"{i}\t{r:.6e}\n")
+            print(f"Residual log saved to '{residual_log}'.")
+        except OSError as exc:
+            die(f"Cannot write residual log '{residual_log}': {exc}")
+
+    x = x / x.sum()
+    return dict(zip(nodes, x.tolist()))
+
+
+def compare_solvers(G, alpha=0.85, tol=1.0e-6, max_iter=1000, dtype='float64'):
+    """
+    Run every solver in SOLVERS on *G* and print iterations, wall time and
+    the L1 distance of each result from plain power iteration.
+
+    Returns the power-iteration PageRank as a dict {node: rank_value}.
+    """
+    if G.number_of_nodes() == 0:
+        die("Cannot compute PageRank on an empty graph.")
+    if not G.is_directed():
+        G = G.to_directed()
+    np, _ = _import_scipy()
+    nodes, Pt, dangling = transition_matrix(G, dtype=dtype)
+    N = len(nodes)
+    print(f"Comparing PageRank solvers  (alpha={alpha}, nodes={N}, "
+          f"edges={G.number_of_edges()}, dtype={dtype}) ...")
+    results = {}
+    print(f"  {'solver':<14} {'iterations':>10} {'time (s)':>10} "
+          f"{'L1 vs power':>12}  converged")
+    for name, solve in SOLVERS.items():
+        started = time.perf_counter()
+        x, iters, residual, converged = solve(
+            Pt, dangling, np.full(N, 1.0 / N, dtype=dtype), alpha, tol, max_iter)
+        elapsed = time.perf_counter() - started
+        x = x / x.sum()
+        results[name] = x
+        diff = float(abs(x - results['power']).sum())
+        print(f"  {name:<14} {iters:>10} {elapsed:>10.4f} {diff:>12.3e}  "
+              f"{'yes' if converged else 'no'}")
+    return dict(zip(nodes, results['power'].tolist()))
+
+
+def load_pagerank(path):
+    """Read a node_rank.txt written by save_pagerank into {node: rank}."""
+    if not os.path.exists(path):
+        die(f"PageRank file not found: '{path}'")
+    ranks = {}
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            for lineno, raw in enumerate(fh, 1):
+                line = raw.rstrip('\n')
+                if not line or line.startswith('#'):
+                    continue
+                node, sep, value = line.rpartition('\t')
+                if not sep:
+                    die(f"{path}:{lineno}: expected 'node<TAB>pagerank'.")
+                ranks[node] = float(value)
+    except ValueError as exc:
+        die(f"Invalid PageRank value in '{path}': {exc}")
+    except OSError as exc:
+        die(f"Cannot read PageRank file '{path}': {exc}")
+    if not ranks:
+        die(f"PageRank file '{path}' contains no values.")
+    print(f"Loaded {len(ranks)} previous PageRank values from '{path}'.")
+    return ranks
+
+
+def _node_key(G, node, ranks):
+    """Key of *node* in a previous rank file: its URL if known there, else its label."""
+    url = G.nodes[node].get('url')
+    if url is not None and url in ranks:
+        return url
+    return str(node)
+
+
+def warm_start_vector(G, nodes, ranks, alpha=0.85):
+    """
+    Starting vector from a previous run's *ranks*.
+
+    Nodes are matched by URL (the 'url' attribute of a saved crawl graph)
+    or by label.  Nodes not seen before get the teleport mass
+    (1 - alpha) / N.  The vector is normalised to sum to one.
+    """
+    np, _ = _import_scipy()
+    N = len(nodes)
+    teleport = (1.0 - alpha) / N
+    x = np.empty(N)
+    matched = 0
+    for i, node in enumerate(nodes):
+        value = ranks.get(_node_key(G, node, ranks))
+        if value is None:
+            x[i] = teleport
+        else:
+            x[i] = value
+            matched += 1
+    print(f"Warm start: {matched} of {N} nodes matched a previous rank; "
+          f"{N - matched} new nodes start at the teleport mass.")
+    return x / x.sum()
+
+
+def push_update(G_old, G, ranks, alpha=0.85, tol=1.0e-6):
+    """
+    Update PageRank for a small edge delta by pushing residuals locally.
+
+    Works on the linear-system form y = alpha * P^T y + 1, whose normalised
+    solution y / sum(y) is PageRank with uniform teleport and dangling
+    mass.  The previous ranks (for *G_old*) are rescaled into a solution y
+    of that system.  For *G*, y is then off only at pages linked from a
+    page whose out-links changed, and at new pages.  Those residuals are
+    pushed forward until every one is below N * tol, the per-page share of
+    the power iteration's L1 stopping rule.  Only the neighbourhood of the
+    changed pages is visited.
+
+    Returns a dict {node: rank_value} for the nodes of *G*.
+    """
+    key_old = {n: _node_key(G_old, n, ranks) for n in G_old}
+    key_new = {n: _node_key(G, n, ranks) for n in G}
+    missing = [k for k in key_old.values() if k not in ranks]
+    if missing:
+        die(f"{len(missing)} nodes of the previous graph have no previous "
+            f"rank (e.g. '{missing[0]}'); the rank file does not belong "
+            f"to that graph.")
+    old_node = {k: n for n, k in key_old.items()}
+    new_node = {k: n for n, k in key_new.items()}
+    # With identical labels on both sides, adjacency dicts compare directly.
+    same_labels = all(key_old.get(n) == k for n, k in key_new.items()
+                      if n in key_old)
+
+    def out_links(H, keys, u):
+        out = {}
+        for v, data in H.succ[u].items():
+            out[keys[v]] = out.get(keys[v], 0.0) + data.get('weight', 1)
+        return out
+
+    # Scale the previous ranks x into y: sum(y) = N + alpha * (mass of
+    # non-dangling y), so sum(y) = N / (1 - alpha * (1 - dangling share)).
+    total = sum(ranks[k] for k in old_node)
+    dangling_share = sum(ranks[k] for k, n in old_node.items()
+                         if not G_old.succ[n]) / total
+    scale = len(old_node) / (1.0 - alpha * (1.0 - dangling_share)) / total
+    y = {k: ranks[k] * scale for k in new_node if k in old_node}
+
+    # Residual r = 1 + alpha * P_new^T y - y, nonzero only around pages
+    # whose out-links changed and at new pages.
+    residual = collections.defaultdict(float)
+    for k, n in old_node.items():
+        m = new_node.get(k)
+        if m is None:
+            after = {}
+        elif same_labels and G_old._succ[n] == G._succ[m]:    # plain dicts: C-speed
+            continue
+        else:
+            after = out_links(G, key_new, m)
+        before = out_links(G_old, key_old, n)
+        if before == after:
+            continue
+        y_k = ranks[k] * scale
+        if before:
+            w_old = sum(before.values())
+            for v, w in before.items():
+                if v in new_node:
+                    residual[v] -= alpha * y_k * w / w_old
+        if after:
+            w_new = sum(after.values())
+            for v, w in after.items():
+                residual[v] += alpha * y_k * w / w_new
+    for k in new_node:
+        if k not in old_node:
+            residual[k] += 1.0
+            y[k] = 0.0
+
+    links = {}
+    eps = tol * len(new_node)
+    queue = collections.deque(k for k, r in residual.items() if abs(r) > eps)
+    queued = set(queue)
+    touched = set(residual)
+    pushes = 0
+    while queue:
+        k = queue.popleft()
+        queued.discard(k)
+        r = residual[k]
+        residual[k] = 0.0
+        y[k] += r
+        pushes += 1
+        out = links.get(k)
+        if out is None:
+            out = links[k] = out_links(G, key_new, new_node[k])
+        if not out:
+            continue    # dangling: the mass leaves the system
+        w_out = sum(out.values())
+        for v, w in out.items():
+            residual[v] += alpha * r * w / w_out
+            touched.add(v)
+            if v not in queued and abs(residual[v]) > eps:
+                queued.add(v)
+                queue.append(v)
+
+    print(f"Push update: {pushes} pushes touched {len(touched)} of "
+          f"{len(new_node)} nodes.")
+    norm = sum(y.values())
+    return {n: y[key_new[n]] / norm for n in G}
+
+
+# Personalized PageRank
+
+def load_seed_sets(path):
+    """
+    Parse a seed-set file.
+
+    Each non-empty line that does not start with '#' is one seed set of
+    whitespace-separated URLs or node labels.  An optional name may come
+    before a tab; unnamed sets are called set1, set2, ...
+
+    Returns a list of (name, [seed, ...]).
+    """
+    if not os.path.exists(path):
+        die(f"Seed-set file not found: '{path}'")
+    seed_sets = []
+    with open(path, 'r', encoding='utf-8') as fh:
+        for raw in fh:
+            line = raw.strip()
+            if not line or line.startswith('#'):
+                continue
+            name, sep, seeds = line.partition('\t')
+            if not sep:
+                name, seeds = f"set{len(seed_sets) + 1}", line
+            seeds = seeds.split()
+            if not seeds:
+                die(f"Seed set '{name}' in '{path}' lists no seeds.")
+            seed_sets.append((name.strip(), seeds))
+    if not seed_sets:
+        die(f"Seed-set file '{path}' contains no seed sets.")
+    print(f"Loaded {len(seed_sets)} seed sets from '{path}'.")
+    return seed_sets
+
+
+def _node_label(G, node):
+    """Display label of a node: its URL if the graph stores one."""
+    return G.nodes[node].get('url', node)
+
+
+def resolve_seed_sets(G, nodes, seed_sets):
+    """
+    Map every seed (URL or label) to a node index.
+
+    Seed sets with no seed in the graph are skipped with a warning.
+    Returns a list of (name, [index, ...]).
+    """
+    index = {}
+    for i, node in enumerate(nodes):
+        index[str(node)] = i
+        url = G.nodes[node].get('url')
+        if url is not None:
+            index[url] = i
+    resolved = []
+    for name, seeds in seed_sets:
+        found = sorted({index[s] for s in seeds if s in index})
+        if found and len(found) < len(set(seeds)):
+            unknown = [s for s in seeds if s not in index]
+            print(f"Warning: seed set '{name}': {len(unknown)} seeds not in "
+                  f"the graph (e.g. '{unknown[0]}').")
+        if found:
+            resolved.append((name, found))
+        else:
+            print(f"Warning: skipping seed set '{name}': no seed is in the graph.")
+    return resolved
+
+
+def personalized_pagerank(Pt, dangling, seed_sets, alpha=0.85, tol=1.0e-6,
+                          max_iter=1000, dtype='float64', block_size=64):
+    """
+    Personalized PageRank for many seed sets by block power iteration.
+
+    Teleport vectors (uniform over each set's seeds) are stacked into a
+    dense N x k matrix V, so each sparse pass Pt @ X advances k vectors at
+    once.  Dangling mass returns to each column's own seeds, as in
+    nx.pagerank with a personalization vector.  At most *block_size*
+    columns are held at a time.
+
+    Yields (name, x) for every seed set, in input order.
+    """
+    np, _ = _import_scipy()
+    N = Pt.shape[0]
+    for start in range(0, len(seed_sets), block_size):
+        block = seed_sets[start:start + block_size]
+        V = np.zeros((N, len(block)), dtype=dtype)
+        for j, (_, seeds) in enumerate(block):
+            V[seeds, j] = 1.0 / len(seeds)
+        X = V.copy()
+        for it in range(1, max_iter + 1):
+            X_last = X
+            X = alpha * (Pt @ X_last)
+            X += V * (alpha * X_last[dangling].sum(axis=0) + (1.0 - alpha))
+            residual = float(abs(X - X_last).sum(axis=0).max())
+            if residual < N * tol:
+                break
+        else:
+            print(f"Warning: personalized PageRank block {start // block_size + 1} "
+                  f"did not converge in {max_iter} iterations; "
+                  f"max L1 residual {residual:.3e}.")
+        print(f"  seed sets {start + 1}-{start + len(block)}: "
+              f"{it} block iterations")
+        for j, (name, _) in enumerate(block):
+            yield name, X[:, j]
+
+
+def push_personalized(P, dangling, seeds, alpha=0.85, eps=1.0e-7):
+    """
+    Approximate personalized PageRank of one seed set by forward push.
 
+    *P* is the row-normalised CSR link matrix (out-links per row).  Residual
+    mass starts on the seeds; a node whose residual exceeds eps times its
+    out-degree keeps (1 - alpha) of it and pushes the rest to its
+    out-links, or back to the seeds if it is dangling.  Only nodes near the
+    seeds are touched, so the cost does not depend on the graph size.
+
+    Returns {index: score} for the touched nodes, normalised to sum to one.
+    """
+    indptr, indices, data = P.indptr, P.indices, P.data
+    seed_share = 1.0 / len(seeds)
+    residual = collections.defaultdict(float)
+    for s in seeds:
+        residual[s] = seed_share
+    p = collections.defaultdict(float)
+
+    def degree(u):
+        return max(1, int(indptr[u + 1] - indptr[u]))
+
+    queue = collections.deque(s for s in seeds if residual[s] > eps * degree(s))
+    queued = set(queue)
+    while queue:
+        u = queue.popleft()
+        queued.discard(u)
+        r = residual.pop(u)
+        p[u] += (1.0 - alpha) * r
+        lo, hi = int(indptr[u]), int(indptr[u + 1])
+        if dangling[u]:
+            targets = [(s, seed_share) for s in seeds]
+        else:
+            targets = zip(indices[lo:hi].tolist(), data[lo:hi].tolist())
+        for v, w in targets:
+            residual[v] += alpha * r * w
+            if v not in queued and residual[v] > eps * degree(v):
+                queued.add(v)
+                queue.append(v)
+    total = sum(p.values())
+    return {u: value / total for u, value in p.items()}
+
+
+def compute_personalized(G, seed_sets, top=10, alpha=0.85, dtype='float64',
+                         push=False):
+    """
+    Top-*top* personalized PageRank nodes for every seed set.
+
+    Uses block power iteration, or forward push when *push* is set.
+    Returns a list of (name, [(node, score), ...]).
+    """
+    if G.number_of_nodes() == 0:
+        die("Cannot compute PageRank on an empty graph.")
+    if not G.is_directed():
+        G = G.to_directed()
+    np, _ = _import_scipy()
+    nodes, Pt, dangling = transition_matrix(G, dtype=dtype)
+    resolved = resolve_seed_sets(G, nodes, seed_sets)
+    if not resolved:
+        die("No seed set has a seed in the graph.")
+
+    mode = 'forward push' if push else 'block power iteration'
+    print(f"Computing personalized PageRank for {len(resolved)} seed sets "
+          f"({mode}, alpha={alpha}, nodes={len(nodes)}) ...")
+    results = []
+    if push:
+        P = Pt.T.tocsr()
+        for name, seeds in resolved:
+            scores = push_personalized(P, dangling, seeds, alpha)
+            best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top]
+            results.append((name, [(nodes[i], s) for i, s in best]))
+    else:
+        for name, x in personalized_pagerank(Pt, dangling, resolved, alpha,
+                                             dtype=dtype):
+            k = min(top, len(x))
+            best = np.argpartition(-x, k - 1)[:k]
+            best = best[np.argsort(-x[best], kind='stable')]
+            results.append((name, [(nodes[i], float(x[i])) for i in best]))
+    return results
+
+
+def save_personalized(G, results, path):
+    """Write the top nodes of every seed set to a tab-separated file."""
     try:
-        pr = nx.pagerank(G, alpha=alpha, max_iter=200, tol=1.0e-6)
-    except nx.PowerIterationFailedConvergence:
-        print("Warning: PageRank did not fully converge; using partial result.")
-        pr = nx.pagerank(G, alpha=alpha, max_iter=1000, tol=1.0e-4)
+        with open(path, 'w', encoding='utf-8') as fh:
+            fh.write("# Personalized PageRank (alpha=0.85), top nodes per seed set\n")
+            fh.write("# seed_set\trank\tnode\tpagerank\n")
+            for name, best in results:
+                for rank, (node, score) in enumerate(best, 1):
+                    fh.write(f"{name}\t{rank}\t{_node_label(G, node)}\t{score:.10f}\n")
+        print(f"Personalized PageRank values saved to '{path}'.")
+    except OSError as exc:
+        die(f"Cannot write personalized PageRank file '{path}': {exc}")
+
+
+# Out-of-core PageRank over a binary edge file
+#
+# <edge_file>        int32 (src, dst) pairs sorted by src, native order
+# <edge_file>.nodes  one label (URL if known) per line; line i is node i
 
-    return pr
+EDGE_DTYPE = [('src', '<i4'), ('dst', '<i4')]
+EDGE_CHUNK = 1 << 22        # edges per mmap chunk (32 MiB)
+
+_GML_TOKEN = re.compile(r'\[|\]|"[^"]*"|[^\s\[\]"]+')
+
+
+def _gml_records(path):
+    """
+    Stream the node and edge records of a GML file.
+
+    Yields ('graph', key, value) for graph-level keys and ('node', attrs) /
+    ('edge', attrs) for every record, holding only one record in memory.
+    """
+    stack = []          # names of the open lists
+    attrs = None
+    key = None
+    with open(path, 'r', encoding='utf-8') as fh:
+        for line in fh:
+            for tok in _GML_TOKEN.findall(line):
+                if tok == '[':
+                    stack.append(key)
+                    if len(stack) == 2 and key in ('node', 'edge'):
+                        attrs = {}
+                    key = None
+                elif tok == ']':
+                    if not stack:
+                        raise ValueError("unbalanced ']'")
+                    name = stack.pop()
+                    if len(stack) == 1 and name in ('node', 'edge'):
+                        yield name, attrs
+                        attrs = None
+                elif key is None:
+                    key = tok
+                else:
+                    value = html.unescape(tok[1:-1]) if tok.startswith('"') else tok
+                    if len(stack) == 1:
+                        yield 'graph', key, value
+                    elif len(stack) == 2 and attrs is not None:
+                        attrs[key] = value
+                    key = None
+    if stack:
+        raise ValueError("unexpected end of file inside a list")
+
+
+def _write_sorted_edges(raw_path, out_path, counts):
+    """
+    Counting-sort the raw (src, dst) pairs in *raw_path* by src.
+
+    *counts* holds the out-degree of every node, so each chunk can be
+    scattered straight to its final offsets in a memory-mapped output.
+    """
+    np, _ = _import_scipy()
+    M = int(counts.sum())
+    cursor = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=cursor[1:])
+    if M == 0:
+        open(out_path, 'wb').close()
+        return
+    raw = np.memmap(raw_path, dtype=EDGE_DTYPE, mode='r')
+    out = np.memmap(out_path, dtype=EDGE_DTYPE, mode='w+', shape=(M,))
+    for lo in range(0, M, EDGE_CHUNK):
+        chunk = np.array(raw[lo:lo + EDGE_CHUNK])
+        chunk = chunk[np.argsort(chunk['src'], kind='stable')]
+        src = chunk['src']
+        starts = np.flatnonzero(np.r_[True, src[1:] != src[:-1]])
+        group = np.repeat(starts, np.diff(np.r_[starts, len(src)]))
+        pos = cursor[src] + (np.arange(len(src)) - group)
+        out[pos] = chunk
+        np.add.at(cursor, src[starts], np.diff(np.r_[starts, len(src)]))
+    out.flush()
+    del raw, out
+
+
+def convert_to_edge_file(source, out_path):
+    """
+    Convert a graph into a sorted binary edge file plus its node table.
+
+    *source* is a CrawlGraph, a networkx graph or the path of a GML file.
+    GML files are streamed record by record, so the graph is never held as
+    Python objects.  Undirected graphs get both directions, like
+    load_graph; edge weights are ignored.  Nodes are labelled as the
+    in-memory path labels them: by URL for a crawl, by node name for a
+    networkx graph and by the 'label' attribute (as nx.read_gml) for GML.
+    """
+    np, _ = _import_scipy()
+    raw_path = out_path + '.raw'
+    index = {}
+    labels = []
+    counts = np.zeros(0, dtype=np.int64)
+
+    def node_id(key, label=None):
+        i = index.get(key)
+        if i is None:
+            i = index[key] = len(labels)
+            labels.append(label if label is not None else key)
+        return i
+
+    batch = []
+
+    def flush(fh):
+        nonlocal counts
+        if batch:
+            pairs = np.array(batch, dtype=np.int32)
+            pairs.tofile(fh)
+            c = np.bincount(pairs[:, 0])
+            if len(c) > len(counts):
+                counts = np.concatenate([counts, np.zeros(len(c) - len(counts), np.int64)])
+            counts[:len(c)] += c
+            batch.clear()
+
+    try:
+        with open(raw_path, 'wb') as fh:
+            if isinstance(source, CrawlGraph):
+                nodes, src, dst = source.edges()
+                labels = [source.urls[i] for i in nodes.tolist()]
+                np.stack([src, dst], axis=1).astype(np.int32).tofile(fh)
+                counts = np.bincount(src, minlength=len(labels))
+            elif isinstance(source, (nx.Graph, nx.DiGraph)):
+                directed = source.is_directed()
+                for n in source.nodes():
+                    node_id(n)
+                for u, v in source.edges():
+                    batch.append((index[u], index[v]))
+                    if not directed:
+                        batch.append((index[v], index[u]))
+                    if len(batch) >= EDGE_CHUNK:
+                        flush(fh)
+            else:
+                if not os.path.exists(source):
+                    die(f"Input file not found: '{source}'")
+                directed = False
+                for rec in _gml_records(source):
+                    if rec[0] == 'graph':
+                        if rec[1] == 'directed':
+                            directed = rec[2] == '1'
+                    elif rec[0] == 'node':
+                        attrs = rec[1]
+                        if 'id' not in attrs:
+                            die(f"GML node without an id in '{source}'.")
+                        node_id(attrs['id'], attrs.get('label', attrs['id']))
+                    else:
+                        attrs = rec[1]
+                        if 'source' not in attrs or 'target' not in attrs:
+                            die(f"GML edge without source/target in '{source}'.")
+                        u, v = node_id(attrs['source']), node_id(attrs['target'])
+                        batch.append((u, v))
+                        if not directed and u != v:
+                            batch.append((v, u))
+                        if len(batch) >= EDGE_CHUNK:
+                            flush(fh)
+            flush(fh)
+        if not labels:
+            die("Cannot build an edge file from an empty graph.")
+        counts = np.concatenate([counts, np.zeros(len(labels) - len(counts), np.int64)])
+        _write_sorted_edges(raw_path, out_path, counts)
+        with open(out_path + '.nodes', 'w', encoding='utf-8') as fh:
+            for label in labels:
+                fh.write(f"{label}\n")
+    except ValueError as exc:
+        die(f"Failed to parse GML file '{source}': {exc}")
+    except OSError as exc:
+        die(f"Cannot write edge file '{out_path}': {exc}")
+    finally:
+        if os.path.exists(raw_path):
+            os.remove(raw_path)
+
+    print(f"Edge file written to '{out_path}': {len(labels)} nodes, "
+          f"{int(counts.sum())} edges.")
+
+
+def load_edge_file(path):
+    """Memory-map an edge file; returns (labels, edges)."""
+    np, _ = _import_scipy()
+    nodes_path = path + '.nodes'
+    if not os.path.exists(path) or not os.path.exists(nodes_path):
+        die(f"Edge file '{path}' or its node table '{nodes_path}' not found.")
+    with open(nodes_path, 'r', encoding='utf-8') as fh:
+        labels = [line.rstrip('\n') for line in fh]
+    if os.path.getsize(path) == 0:
+        edges = np.zeros(0, dtype=EDGE_DTYPE)
+    else:
+        edges = np.memmap(path, dtype=EDGE_DTYPE, mode='r')
+    print(f"Mapped edge file '{path}': {len(labels)} nodes, {len(edges)} edges.")
+    return labels, edges
+
+
+def edge_file_out_degrees(edges, N):
+    """Out-degree of every node, streamed over the edge file."""
+    np, _ = _import_scipy()
+    deg = np.zeros(N, dtype=np.int64)
+    for lo in range(0, len(edges), EDGE_CHUNK):
+        deg += np.bincount(edges['src'][lo:lo + EDGE_CHUNK], minlength=N)
+    return deg
+
+
+def compute_pagerank_external(labels, edges, alpha=0.85, tol=1.0e-6,
+                              max_iter=1000, dtype='float64'):
+    """
+    PageRank by power iteration streamed over a memory-mapped edge file.
+
+    Each iteration reads the edges in chunks of EDGE_CHUNK and scatters
+    x[src] / outdeg[src] onto dst with np.bincount, so only a few N-sized
+    vectors stay in memory.  Convergence and dangling handling match
+    compute_pagerank.
+
+    Returns a dict {label: rank_value}.
+    """
+    np, _ = _import_scipy()
+    N, M = len(labels), len(edges)
+    print(f"Computing PageRank out of core  (alpha={alpha}, nodes={N}, "
+          f"edges={M}, dtype={dtype}) ...")
+    deg = edge_file_out_degrees(edges, N)
+    dangling = deg == 0
+    inv = np.zeros(N, dtype=dtype)
+    inv[~dangling] = 1.0 / deg[~dangling]
+    x = np.full(N, 1.0 / N, dtype=dtype)
+    teleport = (1.0 - alpha) / N
+    residual = float('inf')
+    for it in range(1, max_iter + 1):
+        share = x * inv
+        y = np.zeros(N, dtype=dtype)
+        for lo in range(0, M, EDGE_CHUNK):
+            chunk = edges[lo:lo + EDGE_CHUNK]
+            y += np.bincount(chunk['dst'], weights=share[chunk['src']],
+                             minlength=N).astype(dtype, copy=False)
+        y *= alpha
+        y += alpha * x[dangling].sum() / N + teleport
+        residual = float(abs(y - x).sum())
+        x = y
+        if residual < N * tol:
+            print(f"PageRank converged in {it} iterations "
+                  f"(L1 residual {residual:.3e}).")
+            break
+    else:
+        print(f"Warning: PageRank did not converge in {max_iter} iterations; "
+              f"L1 residual {residual:.3e} (target {N * tol:.3e}). "
+              f"Using the current vector.")
+    x = x / x.sum()
+    return dict(zip(labels, x.tolist()))
 
 
 def save_pagerank(pr, path):
@@ -370,6 +2146,14 @@ def plot_loglog(G, output_file='degree_distribution_loglog.png'):
         x_label = 'Degree  k'
         title_tag = 'Degree'
 
+    plot_degree_distribution(deg_seq, G.number_of_edges(), x_label, title_tag,
+                             output_file)
+
+
+def plot_degree_distribution(deg_seq, n_edges, x_label='Out-degree  k',
+                             title_tag='Out-degree',
+                             output_file='degree_distribution_loglog.png'):
+    """Save a log-log plot of the distribution of the degrees in *deg_seq*."""
     count = collections.Counter(deg_seq)
     ks = sorted(k for k in count if k > 0)
     ns = [count[k] for k in ks]
@@ -386,7 +2170,7 @@ def plot_loglog(G, output_file='degree_distribution_loglog.png'):
     ax.set_ylabel('log(Count)', fontsize=12)
     ax.set_title(
         f'Log-Log {title_tag} Distribution\n'
-        f'({G.number_of_nodes()} nodes,  {G.number_of_edges()} edges)',
+        f'({len(deg_seq)} nodes,  {n_edges} edges)',
         fontsize=13,
     )
     ax.grid(True, which='both', linestyle='--', alpha=0.4)
@@ -431,6 +2215,58 @@ def main():
             'crawling to, remaining lines are seed URLs.'
         ),
     )
+    parser.add_argument(
+        '--checkpoint', metavar='crawl.sqlite',
+        help=(
+            'Checkpoint the crawl frontier, pages and links to this SQLite '
+            'file while crawling.'
+        ),
+    )
+    parser.add_argument(
+        '--checkpoint_every', type=int, default=50, metavar='N',
+        help='Pages crawled between checkpoints (default: 50).',
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help=(
+            'Continue the crawl saved in --checkpoint instead of starting '
+            'from the seed URLs.  Crawled pages are not fetched again.'
+        ),
+    )
+    parser.add_argument(
+        '--engine', choices=('scrapy', 'async'), default='scrapy',
+        help=(
+            'Crawler engine: Scrapy (default) or an asyncio/aiohttp crawler '
+            'with the same output.'
+        ),
+    )
+    parser.add_argument(
+        '--concurrency', type=int, default=8, metavar='N',
+        help='Requests in flight at once while crawling (default: 8).',
+    )
+    parser.add_argument(
+        '--per_host', type=int, default=8, metavar='N',
+        help='Requests in flight to one host (default: 8).',
+    )
+    parser.add_argument(
+        '--delay', type=float, default=0.2, metavar='SECONDS',
+        help=(
+            'Average delay between requests to one host; each delay is '
+            'randomised between 0.5x and 1.5x (default: 0.2).'
+        ),
+    )
+    parser.add_argument(
+        '--offline', metavar='corpus',
+        help=(
+            'Crawl saved pages instead of the live site: a WARC file '
+            '(.warc or .warc.gz) or a <host>/<path> directory mirror.  '
+            'Uses the max_nodes, domain and seeds of --crawler.'
+        ),
+    )
+    parser.add_argument(
+        '--workers', type=int, default=None, metavar='N',
+        help='Worker processes for --offline (default: one per CPU).',
+    )
     parser.add_argument(
         '--input', metavar='graph.gml',
         help='Pre-built directed GML graph to use instead of crawling.',
@@ -450,12 +2286,101 @@ def main():
         '--pagerank_values', metavar='node_rank.txt',
         help='Save PageRank values for every node to this text file.',
     )
+    parser.add_argument(
+        '--previous_ranks', metavar='node_rank.txt',
+        help=(
+            'PageRank values of an earlier run (as written by '
+            '--pagerank_values). Used as the starting vector; nodes are '
+            'matched by URL and new nodes start at the teleport mass.'
+        ),
+    )
+    parser.add_argument(
+        '--previous_graph', metavar='old_graph.gml',
+        help=(
+            'Graph the --previous_ranks were computed on. Instead of power '
+            'iteration, push residuals out from pages whose links changed. '
+            'Fast when the edge delta is small.'
+        ),
+    )
+    parser.add_argument(
+        '--seed_sets', metavar='seeds.txt',
+        help=(
+            'Compute personalized PageRank for every seed set in this file '
+            '(one set per line: optional name and a tab, then '
+            'whitespace-separated URLs or node labels) instead of global '
+            'PageRank.'
+        ),
+    )
+    parser.add_argument(
+        '--ppr_output', metavar='personalized_rank.txt',
+        default='personalized_rank.txt',
+        help='Output file for --seed_sets (default: personalized_rank.txt).',
+    )
+    parser.add_argument(
+        '--top', type=int, default=10,
+        help='Number of top nodes written per seed set (default: 10).',
+    )
+    parser.add_argument(
+        '--ppr_push', action='store_true',
+        help=(
+            'Approximate personalized PageRank by forward push from the '
+            'seeds. Fast for small seed sets on large graphs.'
+        ),
+    )
+    parser.add_argument(
+        '--edge_file', metavar='edges.bin',
+        help=(
+            'Run PageRank out of core over this binary edge file. A crawl '
+            'writes it first; with --input it is built by streaming the GML '
+            'file if it does not exist; otherwise the existing file is used.'
+        ),
+    )
+    parser.add_argument(
+        '--solver', choices=sorted(SOLVERS) + ['compare'], default='power',
+        help=(
+            'PageRank solver: power iteration (default), gauss-seidel, '
+            'extrapolation (quadratic, every 10 iterations) or adaptive '
+            '(freezes converged nodes). "compare" runs all of them and '
+            'prints iterations and wall time.'
+        ),
+    )
+    parser.add_argument(
+        '--float32', action='store_true',
+        help='Run PageRank in single precision to halve its memory use.',
+    )
+    parser.add_argument(
+        '--residual_log', metavar='residuals.tsv',
+        help='Write the L1 residual of every PageRank iteration to this file.',
+    )
 
     args = parser.parse_args()
 
     # Validate
-    if not args.crawler and not args.input:
-        parser.error("Provide at least one of --crawler or --input.")
+    if not args.crawler and not args.input and not args.edge_file:
+        parser.error("Provide at least one of --crawler, --input or --edge_file.")
+    if args.edge_file and (args.previous_ranks or args.seed_sets):
+        parser.error("--edge_file cannot be combined with --previous_ranks "
+                     "or --seed_sets.")
+    if args.previous_graph and not args.previous_ranks:
+        parser.error("--previous_graph requires --previous_ranks.")
+    if args.top < 1:
+        parser.error("--top must be at least 1.")
+    if (args.checkpoint or args.resume) and not args.crawler:
+        parser.error("--checkpoint and --resume require --crawler.")
+    if args.offline and not args.crawler:
+        parser.error("--offline requires --crawler.")
+    if args.offline and args.checkpoint:
+        parser.error("--offline cannot be combined with --checkpoint.")
+    if args.concurrency < 1 or args.per_host < 1:
+        parser.error("--concurrency and --per_host must be at least 1.")
+    if args.delay < 0:
+        parser.error("--delay must not be negative.")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1.")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint.")
+    if args.checkpoint_every < 1:
+        parser.error("--checkpoint_every must be at least 1.")
 
     # Build / load the graph
     G = None
@@ -463,26 +2388,77 @@ def main():
     if args.crawler:
         # --crawler takes precedence over --input when both are given.
         max_nodes, domain, start_urls = parse_crawler_file(args.crawler)
-        G = crawl_with_scrapy(max_nodes, domain, start_urls)
-
-        if G.number_of_nodes() == 0:
+        if args.offline:
+            crawl = crawl_offline(max_nodes, domain, start_urls, args.offline,
+                                  args.workers)
+        else:
+            checkpoint = None
+            if args.checkpoint:
+                checkpoint = CrawlCheckpoint(args.checkpoint,
+                                             args.checkpoint_every)
+            crawl_fn = crawl_async if args.engine == 'async' else crawl_with_scrapy
+            crawl = crawl_fn(max_nodes, domain, start_urls, checkpoint,
+                             args.resume, args.concurrency, args.per_host,
+                             args.delay)
+
+        if crawl.n_crawled == 0:
             die(
                 "Crawling produced an empty graph.  "
                 "Check your crawler.txt and network connection."
             )
 
         if args.crawler_graph:
-            save_crawled_graph(G, args.crawler_graph)
+            crawl.save_gml(args.crawler_graph)
+        if args.edge_file:
+            convert_to_edge_file(crawl, args.edge_file)
+        else:
+            G = crawl.to_digraph()
+
+    if args.edge_file:
+        # Out of core: never build the graph as Python objects.
+        if not os.path.exists(args.edge_file):
+            if not args.input:
+                die(f"Edge file not found: '{args.edge_file}'")
+            convert_to_edge_file(args.input, args.edge_file)
+        labels, edges = load_edge_file(args.edge_file)
+        if not labels:
+            die("Cannot compute PageRank on an empty graph.")
+        if args.loglogplot:
+            plot_degree_distribution(
+                edge_file_out_degrees(edges, len(labels)).tolist(), len(edges))
+        pr = compute_pagerank_external(
+            labels, edges, dtype='float32' if args.float32 else 'float64')
+        if args.pagerank_values:
+            save_pagerank(pr, args.pagerank_values)
+        else:
+            _print_top10(sorted(pr.items(), key=lambda kv: kv[1], reverse=True))
+        return
 
-    else:
+    if G is None:
         G = load_graph(args.input)
 
     # Log-log plot
     if args.loglogplot:
         plot_loglog(G)
 
+    # Personalized PageRank replaces the global ranking
+    if args.seed_sets:
+        results = compute_personalized(
+            G, load_seed_sets(args.seed_sets), args.top,
+            dtype='float32' if args.float32 else 'float64', push=args.ppr_push)
+        save_personalized(G, results, args.ppr_output)
+        return
+
     # PageRank
-    pr = compute_pagerank(G)
+    previous = load_pagerank(args.previous_ranks) if args.previous_ranks else None
+    if args.previous_graph:
+        pr = push_update(load_graph(args.previous_graph), G, previous)
+    elif args.solver == 'compare':
+        pr = compare_solvers(G, dtype='float32' if args.float32 else 'float64')
+    else:
+        pr = compute_pagerank(G, dtype='float32' if args.float32 else 'float64',
+                              residual_log=args.residual_log, start=previous,
+                              solver=args.solver)
 
     if args.pagerank_values:
         save_pagerank(pr, args.pagerank_values)